@@ -0,0 +1,213 @@
+# Benchmark offline de extracción de Pura Noticia
+# Reproduce los snapshots HTML de fixtures/ a través de PuraNoticiaExtractor, sin red,
+# y compara los resultados con las salidas de referencia (golden.json)
+#
+# Uso:
+#   python benchmarks/bench_extraction.py                    # tiempos, memoria y comparación
+#   python benchmarks/bench_extraction.py --parser lxml      # probar otro motor de parseo
+#   python benchmarks/bench_extraction.py --update-golden    # regenerar golden.json
+#   python benchmarks/bench_extraction.py --record           # guardar snapshots del sitio real
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sync_news
+from replay import FIXTURES_DIR, MANIFEST_PATH, FixtureAdapter, load_manifest, mount_fixtures
+
+GOLDEN_PATH = os.path.join(FIXTURES_DIR, 'golden.json')
+
+
+def create_extractor(args, manifest):
+    """Crea un extractor sin límite de tasa que lee desde los fixtures"""
+    extractor = sync_news.PuraNoticiaExtractor(
+        requests_per_second=0,
+        parser=args.parser,
+        fast_parse=not args.no_fast_parse
+    )
+    mount_fixtures(extractor.session, FixtureAdapter(manifest))
+    return extractor
+
+
+def split_urls(extractor, manifest):
+    """Separa las URLs guardadas en páginas de categoría y artículos"""
+    category_urls = [url for url in extractor.categories.values() if url in manifest]
+    article_urls = [url for url in manifest if url not in category_urls]
+    return category_urls, article_urls
+
+
+def collect_hrefs(extractor, category_urls):
+    """Todos los href de las páginas de categoría, para medir el clasificador de URLs"""
+    hrefs = []
+    for url in category_urls:
+        hrefs.extend(href for href in extractor.extract_links(extractor.fetch(url).content) if href)
+    return hrefs
+
+
+def measure(fn, repeat):
+    """Mide una etapa: tiempos por repetición, memoria neta y pico (tracemalloc)"""
+    result = fn()  # Calentamiento (y resultado para comparar)
+
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+
+    # La medición de memoria va aparte para no distorsionar los tiempos
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    fn()
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    diff = after.compare_to(before, 'filename')
+    return result, {
+        'runs': repeat,
+        'mean_ms': statistics.mean(timings) * 1000,
+        'min_ms': min(timings) * 1000,
+        'max_ms': max(timings) * 1000,
+        'alloc_blocks': sum(stat.count_diff for stat in diff),
+        'alloc_kb': sum(stat.size_diff for stat in diff) / 1024,
+        'peak_kb': peak / 1024
+    }
+
+
+def run_benchmark(args):
+    """Ejecuta todas las etapas y retorna (resultados, métricas)"""
+    manifest = load_manifest()
+    extractor = create_extractor(args, manifest)
+    category_urls, article_urls = split_urls(extractor, manifest)
+    hrefs = collect_hrefs(extractor, category_urls)
+
+    stages = {
+        'extract_first_news_url': lambda: {
+            url: extractor.extract_first_news_url(url) for url in category_urls
+        },
+        'is_valid_news_url': lambda: {
+            href: extractor.is_valid_news_url(href) for href in hrefs
+        },
+        'extract_article_content': lambda: {
+            url: extractor.extract_article_content(url) for url in article_urls
+        }
+    }
+    calls = {
+        'extract_first_news_url': len(category_urls),
+        'is_valid_news_url': len(hrefs),
+        'extract_article_content': len(article_urls)
+    }
+
+    results = {}
+    metrics = {}
+    for name, fn in stages.items():
+        results[name], metrics[name] = measure(fn, args.repeat)
+        metrics[name]['calls'] = calls[name]
+        metrics[name]['per_call_ms'] = metrics[name]['mean_ms'] / max(1, calls[name])
+
+    return results, metrics
+
+
+def compare_golden(results):
+    """Compara los resultados con golden.json; retorna la lista de diferencias"""
+    with open(GOLDEN_PATH, encoding='utf-8') as f:
+        golden = json.load(f)
+
+    # Normalizar tipos (tuplas, etc.) pasando por JSON
+    results = json.loads(json.dumps(results, ensure_ascii=False))
+
+    differences = []
+    for stage, expected in golden.items():
+        actual = results.get(stage, {})
+        for key in sorted(set(expected) | set(actual)):
+            if expected.get(key) != actual.get(key):
+                differences.append(f"{stage}: {key[:80]}")
+    return differences
+
+
+def print_report(args, metrics):
+    """Imprime la tabla de métricas por etapa"""
+    print(f"⚙️ Motor: {args.parser} | parseo acotado: {'no' if args.no_fast_parse else 'sí'} "
+          f"| repeticiones: {args.repeat}")
+    print(f"{'Etapa':<26}{'llamadas':>9}{'media ms':>11}{'ms/llamada':>12}"
+          f"{'bloques':>10}{'neto KB':>10}{'pico KB':>10}")
+    for name, m in metrics.items():
+        print(f"{name:<26}{m['calls']:>9}{m['mean_ms']:>11.2f}{m['per_call_ms']:>12.3f}"
+              f"{m['alloc_blocks']:>10}{m['alloc_kb']:>10.1f}{m['peak_kb']:>10.1f}")
+
+
+def record_fixtures(args):
+    """Descarga del sitio real las páginas de categoría y su primera noticia"""
+    extractor = sync_news.PuraNoticiaExtractor(parser=args.parser)
+    manifest = {}
+
+    for category_name, category_url in extractor.categories.items():
+        slug = sync_news.normalize_text(category_name).replace(' ', '-')
+        print(f"📥 Guardando categoría: {category_name}")
+
+        response = extractor.fetch(category_url)
+        filename = f"category_{slug}.html"
+        with open(os.path.join(FIXTURES_DIR, filename), 'wb') as f:
+            f.write(response.content)
+        manifest[category_url] = filename
+
+        news_url = extractor.extract_first_news_url(category_url)
+        if news_url:
+            response = extractor.fetch(news_url)
+            filename = f"article_{slug}.html"
+            with open(os.path.join(FIXTURES_DIR, filename), 'wb') as f:
+                f.write(response.content)
+            manifest[news_url] = filename
+
+    with open(MANIFEST_PATH, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    print(f"✅ {len(manifest)} páginas guardadas en {FIXTURES_DIR}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark offline de extracción de Pura Noticia")
+    parser.add_argument('--parser', default='html.parser', choices=['html.parser', 'lxml', 'selectolax'])
+    parser.add_argument('--no-fast-parse', action='store_true', help="parsear el documento completo")
+    parser.add_argument('--repeat', type=int, default=5, help="repeticiones por etapa")
+    parser.add_argument('--json', help="guardar las métricas en este archivo JSON")
+    parser.add_argument('--update-golden', action='store_true', help="regenerar golden.json")
+    parser.add_argument('--record', action='store_true', help="guardar snapshots del sitio real")
+    args = parser.parse_args()
+
+    if args.record:
+        record_fixtures(args)
+        return 0
+
+    results, metrics = run_benchmark(args)
+    print_report(args, metrics)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'parser': args.parser, 'fast_parse': not args.no_fast_parse,
+                       'metrics': metrics}, f, indent=2)
+
+    if args.update_golden:
+        with open(GOLDEN_PATH, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2, sort_keys=True)
+        print(f"📝 golden.json actualizado")
+        return 0
+
+    differences = compare_golden(results)
+    if differences:
+        print(f"❌ {len(differences)} resultado(s) distintos de golden.json:")
+        for difference in differences[:20]:
+            print(f"   • {difference}")
+        return 1
+
+    print("✅ Resultados idénticos a golden.json")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+# Benchmark de punta a punta de run_news_sync contra un WordPress falso en proceso
+# Las páginas de Pura Noticia salen de fixtures/ y WordPress de fake_wordpress.py,
+# así que no se usa la red ni el sitio de producción
+#
+# Uso:
+#   python benchmarks/bench_wordpress.py                          # modo por pasos
+#   python benchmarks/bench_wordpress.py --pipeline               # modo pipeline
+#   python benchmarks/bench_wordpress.py --batch                  # publicación con /batch/v1
+#   python benchmarks/bench_wordpress.py --batch --batch-delay 3000 --read-timeout 1   # lote que vence el timeout
+#   python benchmarks/bench_wordpress.py --latency 80 --error-rate 0.05 --articles 5
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# El estado local (índices y caches) va a un directorio temporal limpio
+os.environ['SYNC_STATE_DIR'] = tempfile.mkdtemp(prefix='bench_sync_state_')
+
+import sync_news
+from fake_wordpress import FakeWordPress
+from replay import FixtureAdapter, mount_fixtures
+
+
+def run_once(args, site):
+    """Ejecuta run_news_sync una vez; retorna (éxito, segundos, WordPressAPI, salida)"""
+    adapter = FixtureAdapter(synthetic_articles=True)
+
+    extractor = sync_news.create_extractor()
+    mount_fixtures(extractor.session, adapter)
+
+    wordpress_api = sync_news.create_wordpress_api(site.url, 'benchmark', 'benchmark')
+    mount_fixtures(wordpress_api.session, adapter)
+
+    output = io.StringIO()
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(output if not args.verbose else sys.stdout):
+        success = sync_news.run_news_sync(extractor=extractor, wordpress_api=wordpress_api)
+    elapsed = time.perf_counter() - started
+
+    return success, elapsed, wordpress_api, output.getvalue()
+
+
+def print_report(args, site, success, elapsed, wordpress_api):
+    """Imprime throughput, requests por endpoint y latencias"""
+    created = len(site.state.posts)
+    mode = 'pipeline' if args.pipeline else 'por pasos'
+    if args.batch:
+        mode += ' + lotes'
+    print(f"⚙️ Modo: {mode} | latencia: {args.latency} ms "
+          f"(+{args.jitter} ms) | errores: {args.error_rate:.0%} | noticias/categoría: {args.articles}")
+    print(f"{'✅' if success else '❌'} {created} posts en {elapsed:.2f}s → {created / elapsed:.2f} posts/s")
+
+    # Un mismo título publicado dos veces indica que se reenvió algo que el servidor ya había creado
+    duplicates = created - len({post['title']['rendered'] for post in site.state.posts})
+    if duplicates:
+        print(f"❌ {duplicates} post(s) duplicados en el servidor")
+
+    print(f"{'Endpoint':<34}{'requests':>9}{'errores':>9}{'p50 ms':>9}{'p99 ms':>9}")
+    latency = wordpress_api.get_latency_stats()
+    no_calls = {'count': 0, 'p50': 0.0, 'p99': 0.0}
+    for endpoint in sorted(set(site.state.counts) | set(latency)):
+        endpoint_stats = latency.get(endpoint, no_calls)
+        requests_count = site.state.counts.get(endpoint, endpoint_stats['count'])
+        print(f"{endpoint:<34}{requests_count:>9}{site.state.errors.get(endpoint, 0):>9}"
+              f"{endpoint_stats['p50'] * 1000:>9.1f}{endpoint_stats['p99'] * 1000:>9.1f}")
+
+    return {
+        'mode': ('pipeline' if args.pipeline else 'steps') + ('+batch' if args.batch else ''),
+        'success': success,
+        'elapsed_s': elapsed,
+        'posts': created,
+        'posts_per_s': created / elapsed,
+        'duplicates': duplicates,
+        'endpoints': {
+            endpoint: {
+                'requests': site.state.counts.get(endpoint, endpoint_stats['count']),
+                'errors': site.state.errors.get(endpoint, 0),
+                'p50_ms': endpoint_stats['p50'] * 1000,
+                'p99_ms': endpoint_stats['p99'] * 1000
+            }
+            for endpoint, endpoint_stats in latency.items()
+        }
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de run_news_sync contra un WordPress falso")
+    parser.add_argument('--latency', type=float, default=20, help="latencia fija del servidor (ms)")
+    parser.add_argument('--jitter', type=float, default=10, help="latencia aleatoria adicional (ms)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fracción de respuestas con error")
+    parser.add_argument('--error-status', type=int, default=503)
+    parser.add_argument('--articles', type=int, default=3, help="noticias por categoría")
+    parser.add_argument('--pipeline', action='store_true', help="usar el modo pipeline")
+    parser.add_argument('--batch', action='store_true', help="publicar con /batch/v1")
+    parser.add_argument('--batch-max-items', type=int, default=25,
+                        help="tamaño máximo de lote del servidor (0 = sin soporte de lotes)")
+    parser.add_argument('--batch-delay', type=float, default=0,
+                        help="demora de la respuesta de /batch/v1 después de crear los posts (ms)")
+    parser.add_argument('--read-timeout', type=float, help="WP_READ_TIMEOUT del cliente (s)")
+    parser.add_argument('--json', help="guardar el reporte en este archivo JSON")
+    parser.add_argument('--verbose', action='store_true', help="mostrar la salida de run_news_sync")
+    args = parser.parse_args()
+
+    os.environ['PN_ARTICLES_PER_CATEGORY'] = str(args.articles)
+    os.environ['PN_REQUESTS_PER_SECOND'] = '0'
+    os.environ['SYNC_PIPELINE'] = '1' if args.pipeline else '0'
+    os.environ['WP_BATCH_PUBLISH'] = '1' if args.batch else '0'
+    if args.read_timeout:
+        os.environ['WP_READ_TIMEOUT'] = str(args.read_timeout)
+
+    with FakeWordPress(args.latency / 1000, args.jitter / 1000, args.error_rate,
+                       args.error_status, args.batch_max_items, args.batch_delay / 1000) as site:
+        success, elapsed, wordpress_api, output = run_once(args, site)
+        report = print_report(args, site, success, elapsed, wordpress_api)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    if not success:
+        print(output[-2000:])
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,268 @@
+# Servidor WordPress falso en proceso para pruebas offline de WordPressAPI
+# Implementa los endpoints de /wp-json/wp/v2 que usa sync_news.py:
+# users/me, categories, posts (lista, creación y actualización), media y batch/v1,
+# con latencia y errores configurables (y lotes lentos, que se procesan pero responden tarde)
+
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+DEFAULT_CATEGORIES = [
+    'Nacional', 'Regiones', 'Deportes', 'Internacional',
+    'Región de Valparaíso', 'Espectáculos', 'Negocios'
+]
+
+
+def escape_name(name):
+    """Escapa un nombre como lo entrega la API de WordPress"""
+    return (name.replace('&', '&amp;').replace('á', '&aacute;').replace('é', '&eacute;')
+            .replace('í', '&iacute;').replace('ó', '&oacute;').replace('ú', '&uacute;'))
+
+
+class FakeWordPressState:
+    """Datos y contadores del sitio falso"""
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, error_status=503, batch_max_items=25,
+                 batch_delay=0.0):
+        self.lock = threading.Lock()
+        self.batch_max_items = batch_max_items
+        self.batch_delay = batch_delay
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+
+        self.categories = [
+            {'id': i + 1, 'name': escape_name(name), 'slug': name.lower().replace(' ', '-')}
+            for i, name in enumerate(DEFAULT_CATEGORIES)
+        ]
+        self.posts = []
+        self.media = []
+        self.next_id = 1000
+
+        self.counts = {}
+        self.errors = {}
+
+    def new_id(self):
+        with self.lock:
+            self.next_id += 1
+            return self.next_id
+
+
+class FakeWordPressHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def state(self):
+        return self.server.state
+
+    def send_json(self, status, data, headers=None):
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=UTF-8')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, str(value))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def page(self, items, query):
+        """Lista paginada con los headers X-WP-Total/X-WP-TotalPages"""
+        per_page = int(query.get('per_page', 10))
+        page = int(query.get('page', 1))
+        total_pages = max(1, -(-len(items) // per_page))
+
+        if page > total_pages:
+            return 400, {'code': 'rest_post_invalid_page_number'}, {}
+
+        fields = query.get('_fields')
+        chunk = items[(page - 1) * per_page:page * per_page]
+        if fields:
+            keep = fields.split(',')
+            chunk = [{key: item[key] for key in keep if key in item} for item in chunk]
+
+        return 200, chunk, {'X-WP-Total': len(items), 'X-WP-TotalPages': total_pages}
+
+    def handle_request(self, method):
+        parsed = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+        path = parsed.path.split('/wp-json', 1)[-1]
+        endpoint = f"{method} " + re.sub(r'/\d+', '/<id>', path)
+
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+
+        with self.state.lock:
+            self.state.counts[endpoint] = self.state.counts.get(endpoint, 0) + 1
+
+        # Latencia y errores inyectados
+        delay = self.state.latency + random.uniform(0, self.state.jitter)
+        if delay > 0:
+            time.sleep(delay)
+        if self.state.error_rate and random.random() < self.state.error_rate:
+            with self.state.lock:
+                self.state.errors[endpoint] = self.state.errors.get(endpoint, 0) + 1
+            return self.send_json(self.state.error_status, {'code': 'fake_error'}, {'Retry-After': 0})
+
+        if not self.headers.get('Authorization', '').startswith('Basic '):
+            return self.send_json(401, {'code': 'rest_not_logged_in'})
+
+        return self.send_json(*self.route(method, path, query, body))
+
+    def route(self, method, path, query, body):
+        """Resuelve un request; retorna (status, datos, headers)"""
+        state = self.state
+
+        if path == '/wp/v2/users/me' and method == 'GET':
+            return 200, {'id': 1, 'name': 'Benchmark'}, {}
+
+        if path == '/batch/v1' and state.batch_max_items:
+            if method == 'OPTIONS':
+                return 200, {'namespace': '', 'methods': ['POST'], 'endpoints': [{
+                    'methods': ['POST'],
+                    'args': {'requests': {'type': 'array', 'maxItems': state.batch_max_items}}
+                }]}, {}
+            if method == 'POST':
+                return self.batch(json.loads(body or b'{}'))
+
+        if path == '/wp/v2/categories' and method == 'GET':
+            items = state.categories
+            if 'search' in query:
+                items = [c for c in items if query['search'].lower() in c['name'].lower()]
+            return self.page(items, query)
+
+        if path == '/wp/v2/posts' and method == 'GET':
+            with state.lock:
+                items = list(reversed(state.posts))
+            if 'categories' in query:
+                category_id = int(query['categories'])
+                items = [post for post in items if category_id in post['categories']]
+            return self.page(items, query)
+
+        if path == '/wp/v2/posts' and method == 'POST':
+            data = json.loads(body or b'{}')
+            post_id = state.new_id()
+            post = {
+                'id': post_id,
+                'title': {'rendered': data.get('title', '')},
+                'content': {'rendered': data.get('content', '')},
+                'excerpt': {'rendered': data.get('excerpt', '')},
+                'status': data.get('status', 'draft'),
+                'categories': data.get('categories', []),
+                'featured_media': data.get('featured_media', 0),
+                'meta': data.get('meta', {}),
+                'link': f"http://{self.headers.get('Host')}/?p={post_id}"
+            }
+            with state.lock:
+                state.posts.append(post)
+            return 201, post, {}
+
+        match = re.fullmatch(r'/wp/v2/posts/(\d+)', path)
+        if match:
+            post = next((p for p in state.posts if p['id'] == int(match.group(1))), None)
+            if post is None:
+                return 404, {'code': 'rest_post_invalid_id'}, {}
+            if method == 'GET':
+                return 200, post, {}
+            if method in ('POST', 'PUT', 'PATCH'):
+                data = json.loads(body or b'{}')
+                with state.lock:
+                    for field in ('title', 'content', 'excerpt'):
+                        if field in data:
+                            post[field] = {'rendered': data[field]}
+                    for field in ('categories', 'featured_media', 'meta', 'status'):
+                        if field in data:
+                            post[field] = data[field]
+                return 200, post, {}
+
+        if path == '/wp/v2/media' and method == 'POST':
+            media_id = state.new_id()
+            with state.lock:
+                state.media.append({
+                    'id': media_id,
+                    'bytes': len(body),
+                    'content_type': self.headers.get('Content-Type'),
+                    'disposition': self.headers.get('Content-Disposition')
+                })
+            return 201, {
+                'id': media_id,
+                'source_url': f"http://{self.headers.get('Host')}/media/{media_id}"
+            }, {}
+
+        return 404, {'code': 'rest_no_route'}, {}
+
+    def batch(self, payload):
+        """Procesa un lote de /batch/v1 (solo rutas de posts, como WordPress)"""
+        requests_list = payload.get('requests', [])
+        if len(requests_list) > self.state.batch_max_items:
+            return 400, {'code': 'rest_invalid_param'}, {}
+
+        responses = []
+        for item in requests_list:
+            path = urlparse(item.get('path', '')).path
+            if not path.startswith('/wp/v2/posts'):
+                responses.append({'status': 400, 'body': {'code': 'rest_batch_not_allowed'}, 'headers': {}})
+                continue
+            body = json.dumps(item.get('body', {})).encode('utf-8')
+            status, data, headers = self.route(item.get('method', 'POST'), path, {}, body)
+            responses.append({'status': status, 'body': data, 'headers': headers})
+
+        # Los posts ya quedaron creados aunque el cliente deje de esperar la respuesta
+        if self.state.batch_delay:
+            time.sleep(self.state.batch_delay)
+        return 207, {'responses': responses}, {}
+
+    def do_GET(self):
+        self.handle_request('GET')
+
+    def do_POST(self):
+        self.handle_request('POST')
+
+    def do_PUT(self):
+        self.handle_request('PUT')
+
+    def do_PATCH(self):
+        self.handle_request('PATCH')
+
+    def do_OPTIONS(self):
+        self.handle_request('OPTIONS')
+
+
+class FakeWordPress:
+    """Servidor falso en un hilo propio; usar como context manager"""
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, error_status=503, batch_max_items=25,
+                 batch_delay=0.0):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), FakeWordPressHandler)
+        self.server.daemon_threads = True
+        self.server.state = FakeWordPressState(latency, jitter, error_rate, error_status, batch_max_items,
+                                               batch_delay)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def state(self):
+        return self.server.state
+
+    @property
+    def url(self):
+        host, port = self.server.server_address
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
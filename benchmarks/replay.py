@@ -0,0 +1,110 @@
+# Reproducción offline de páginas de Pura Noticia guardadas en fixtures/
+# Se monta sobre una requests.Session para que el extractor no toque la red
+
+import io
+import json
+import os
+import random
+import re
+from urllib.parse import urlparse
+
+from requests.adapters import BaseAdapter
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+MANIFEST_PATH = os.path.join(FIXTURES_DIR, 'manifest.json')
+
+# Imagen mínima que se sirve para cualquier URL /cms/imag/ sin fixture propio
+PLACEHOLDER_IMAGE = (
+    b'\xff\xd8\xff\xe0\x00\x10JFIF\x00\x01\x01\x00\x00\x01\x00\x01\x00\x00'
+    + b'\x00' * 2048 + b'\xff\xd9'
+)
+
+
+def load_manifest(path=MANIFEST_PATH):
+    """Carga el mapa URL → archivo de fixture"""
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+class FixtureAdapter(BaseAdapter):
+    """Adaptador de requests que responde con los snapshots HTML guardados"""
+    def __init__(self, manifest=None, fixtures_dir=FIXTURES_DIR, synthetic_articles=False):
+        super().__init__()
+        self.manifest = manifest if manifest is not None else load_manifest()
+        self.fixtures_dir = fixtures_dir
+        self.bodies = {}
+        self.requests = 0
+
+        # Con synthetic_articles, cualquier noticia sin snapshot se arma desde un
+        # artículo guardado con el título tomado de la URL y los párrafos desordenados
+        # según la URL, para que no parezcan casi duplicados (para pruebas de carga)
+        self.synthetic_articles = synthetic_articles
+        self.template_url = next(
+            (url for url, filename in self.manifest.items() if filename.startswith('article_')), None
+        )
+
+    def body_for(self, url):
+        """Retorna (contenido, tipo) de una URL guardada, o None"""
+        if url in self.manifest:
+            if url not in self.bodies:
+                with open(os.path.join(self.fixtures_dir, self.manifest[url]), 'rb') as f:
+                    self.bodies[url] = f.read()
+            return self.bodies[url], 'text/html; charset=utf-8'
+
+        # Las imágenes no se guardan: se sirve un JPEG de relleno
+        if '/cms/imag/' in url:
+            return PLACEHOLDER_IMAGE, 'image/jpeg'
+
+        if self.synthetic_articles and self.template_url and '/noticias/' in url:
+            template, content_type = self.body_for(self.template_url)
+            slug = max(urlparse(url).path.split('/'), key=len)
+            title = slug.replace('-', ' ').capitalize()
+            body = re.sub(rb'<h1>.*?</h1>', f'<h1>{title}</h1>'.encode('utf-8'), template, count=1)
+            
+            rng = random.Random(slug)
+            def shuffle(match):
+                words = match.group(1).split()
+                rng.shuffle(words)
+                return b'<p>' + b' '.join(words) + b'</p>'
+            body = re.sub(rb'<p>([^<]+)</p>', shuffle, body)
+            return body, content_type
+        return None
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        self.requests += 1
+        found = self.body_for(request.url)
+
+        response = Response()
+        response.url = request.url
+        response.request = request
+        response.connection = self
+
+        if found is None:
+            response.status_code = 404
+            response.raw = io.BytesIO(b'')
+            response.headers = CaseInsensitiveDict()
+        else:
+            body, content_type = found
+            response.status_code = 200
+            response.raw = io.BytesIO(body)
+            response.headers = CaseInsensitiveDict({
+                'Content-Type': content_type,
+                'Content-Length': str(len(body))
+            })
+
+        response.encoding = 'utf-8'
+        response.reason = 'OK' if found else 'Not Found'
+        return response
+
+    def close(self):
+        pass
+
+
+def mount_fixtures(session, adapter=None):
+    """Monta el adaptador de fixtures sobre una sesión para el dominio de Pura Noticia"""
+    adapter = adapter or FixtureAdapter()
+    session.mount('https://puranoticia.pnt.cl', adapter)
+    session.mount('http://puranoticia.pnt.cl', adapter)
+    return adapter
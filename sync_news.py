@@ -3,22 +3,1412 @@
 
 import requests
 import base64
+import hashlib
+import html
+import io
 import json
 import time
 import os
-from urllib.parse import urlparse
-from bs4 import BeautifulSoup
-from datetime import datetime
+import sqlite3
+import tempfile
+import threading
+import unicodedata
+import xml.etree.ElementTree as ElementTree
+from email.utils import parsedate_to_datetime
+import queue
+import random
+import signal
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from functools import lru_cache
+from types import SimpleNamespace
+from urllib.parse import urlparse, urlunparse
+from bs4 import BeautifulSoup, SoupStrainer
+from bs4.element import CData, NavigableString, Tag
+from datetime import datetime, timedelta, timezone
 import re
+from requests.adapters import HTTPAdapter
+import importlib.util
+import multiprocessing
 
-class PuraNoticiaExtractor:
+# Backend opcional más rápido para extraer enlaces de las páginas de categoría
+try:
+    from selectolax.parser import HTMLParser as SelectolaxParser
+except ImportError:
+    SelectolaxParser = None
+
+# Pillow es opcional: solo se usa para optimizar imágenes antes de subirlas
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+# Directorio para el estado local persistente (índices y caches)
+STATE_DIR = os.getenv('SYNC_STATE_DIR', '.sync_state')
+
+
+def env_int(name, default):
+    """Lee una variable de entorno entera con valor por defecto"""
+    value = os.getenv(name)
+    if value is None or value.strip() == '':
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        print(f"⚠️ Valor inválido para {name}: '{value}', usando {default}")
+        return default
+
+
+def env_float(name, default):
+    """Lee una variable de entorno decimal con valor por defecto"""
+    value = os.getenv(name)
+    if value is None or value.strip() == '':
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        print(f"⚠️ Valor inválido para {name}: '{value}', usando {default}")
+        return default
+
+
+def normalize_url(url):
+    """Normaliza una URL para usarla como clave (sin query, fragmento ni slash final)"""
+    parsed = urlparse(url.strip())
+    path = parsed.path.rstrip('/') or '/'
+    return urlunparse((parsed.scheme.lower(), parsed.netloc.lower(), path, '', '', ''))
+
+
+def resolve_html_parser(name):
+    """Valida el motor de parseo pedido y retorna (motor, parser de BeautifulSoup)"""
+    has_lxml = importlib.util.find_spec('lxml') is not None
+    
+    if name == 'selectolax' and SelectolaxParser is None:
+        print("⚠️ selectolax no está instalado, usando lxml/html.parser")
+        name = 'lxml'
+    if name in ('lxml', 'selectolax'):
+        if has_lxml:
+            return name, 'lxml'
+        print("⚠️ lxml no está instalado, usando html.parser")
+        return 'html.parser', 'html.parser'
+    return 'html.parser', 'html.parser'
+
+
+class ArticleStrainer(SoupStrainer):
+    """Conserva solo las regiones de un artículo que leen los métodos extract_*"""
+    def __init__(self):
+        super().__init__(['h1', 'title', 'p', 'figure', 'div'])
+    
+    @staticmethod
+    def wanted(name, attrs):
+        """Indica si el elemento (y su subárbol) se debe conservar"""
+        attrs = dict(attrs or {})
+        if attrs.get('id') == 'contenido-ppal' or name in ('h1', 'title'):
+            return True
+        
+        classes = (attrs.get('class') or '').split()
+        if name == 'p':
+            return 'bajada' in classes
+        if name == 'figure':
+            return ' '.join(classes) == 'img-wrap desktop'
+        if name == 'div':
+            return 'CUERPO' in classes or 'date' in classes
+        return False
+    
+    def allow_tag_creation(self, nsprefix, name, attrs):
+        # BeautifulSoup >= 4.13
+        return self.wanted(name, attrs)
+    
+    def search_tag(self, markup_name=None, markup_attrs={}):
+        # BeautifulSoup < 4.13
+        return markup_name if self.wanted(markup_name, markup_attrs) else None
+
+
+# Equivalencias tipográficas que WordPress introduce al renderizar títulos
+TYPOGRAPHIC_CHARS = str.maketrans({
+    '‘': "'", '’': "'", '‚': "'", '′': "'",
+    '“': '"', '”': '"', '„': '"', '«': '"', '»': '"', '″': '"',
+    '–': '-', '—': '-', '…': '...', '\xa0': ' '
+})
+
+
+def normalize_text(text):
+    """Normaliza un texto para comparaciones (sin HTML, acentos ni mayúsculas)"""
+    text = html.unescape(text or '').translate(TYPOGRAPHIC_CHARS)
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return ' '.join(text.casefold().split())
+
+
+SPANISH_MONTHS = {
+    'enero': 1, 'febrero': 2, 'marzo': 3, 'abril': 4, 'mayo': 5, 'junio': 6, 'julio': 7,
+    'agosto': 8, 'septiembre': 9, 'setiembre': 9, 'octubre': 10, 'noviembre': 11, 'diciembre': 12
+}
+
+
+def parse_spanish_date(text):
+    """Interpreta fechas como 'Lunes 12 de mayo de 2025'; retorna date o None"""
+    match = re.search(r'(\d{1,2})\s+de\s+([a-z]+)(?:\s+de)?\s+(\d{4})', normalize_text(text))
+    if not match or match.group(2) not in SPANISH_MONTHS:
+        return None
+    try:
+        return datetime(int(match.group(3)), SPANISH_MONTHS[match.group(2)], int(match.group(1))).date()
+    except ValueError:
+        return None
+
+
+def parse_feed_date(text):
+    """Interpreta fechas de feeds (RFC 822 en RSS, ISO 8601 en Atom y sitemaps); retorna timestamp o None"""
+    text = (text or '').strip()
+    if not text:
+        return None
+    try:
+        parsed = parsedate_to_datetime(text)
+    except (TypeError, ValueError):
+        try:
+            parsed = datetime.fromisoformat(text.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def title_fingerprint(title):
+    """Hash del título normalizado"""
+    return hashlib.sha1(normalize_text(title).encode('utf-8')).hexdigest()
+
+
+# Firmas MinHash: 64 permutaciones agrupadas en 16 bandas de 4 valores para la búsqueda (LSH)
+MINHASH_PERMUTATIONS = 64
+MINHASH_BANDS = 16
+MINHASH_PRIME = (1 << 61) - 1
+
+# Mínimo de shingles para calcular una firma (textos más cortos darían falsos positivos)
+MINHASH_MIN_SHINGLES = 8
+
+
+def stable_hash(data):
+    """Hash de 64 bits estable entre ejecuciones (a diferencia de hash())"""
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'big')
+
+
+# Coeficientes fijos de las permutaciones: las firmas guardadas deben seguir siendo comparables
+MINHASH_COEFFICIENTS = [
+    (stable_hash(f'minhash-a-{i}'.encode()) % (MINHASH_PRIME - 1) + 1,
+     stable_hash(f'minhash-b-{i}'.encode()) % MINHASH_PRIME)
+    for i in range(MINHASH_PERMUTATIONS)
+]
+
+
+def minhash(text, shingle_size=3):
+    """Firma MinHash sobre shingles de palabras del texto sin HTML (None si es muy corto)"""
+    words = re.findall(r'\w+', normalize_text(re.sub(r'<[^>]+>', ' ', text or '')))
+    shingles = {' '.join(words[i:i + shingle_size]) for i in range(len(words) - shingle_size + 1)}
+    if len(shingles) < MINHASH_MIN_SHINGLES:
+        return None
+    
+    hashes = [stable_hash(shingle.encode('utf-8')) % MINHASH_PRIME for shingle in shingles]
+    return [min((a * h + b) % MINHASH_PRIME for h in hashes) for a, b in MINHASH_COEFFICIENTS]
+
+
+class SQLiteStore:
+    """Base para índices locales persistentes en SQLite, seguros entre hilos"""
+    schema = ""
+    
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        with self.lock:
+            self.conn.executescript(self.schema)
+            self.conn.commit()
+    
+    def close(self):
+        """Cierra la conexión con la base de datos"""
+        with self.lock:
+            self.conn.close()
+
+
+class SeenUrlIndex(SQLiteStore):
+    """Índice persistente de URLs de origen ya sincronizadas"""
+    schema = """
+        CREATE TABLE IF NOT EXISTS seen_urls (
+            url TEXT PRIMARY KEY,
+            synced_at REAL NOT NULL
+        );
+    """
+    
+    def contains(self, url):
+        """Indica si la URL ya fue sincronizada"""
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT 1 FROM seen_urls WHERE url = ?', (normalize_url(url),)
+            ).fetchone()
+        return row is not None
+    
+    def filter_unseen(self, urls):
+        """Retorna las URLs aún no sincronizadas, conservando el orden"""
+        return [url for url in urls if not self.contains(url)]
+    
+    def add(self, url):
+        """Marca una URL como sincronizada"""
+        with self.lock:
+            self.conn.execute(
+                'INSERT OR IGNORE INTO seen_urls (url, synced_at) VALUES (?, ?)',
+                (normalize_url(url), time.time())
+            )
+            self.conn.commit()
+
+
+class PostIndex(SQLiteStore):
+    """Índice local de posts publicados por hash de título y URL de origen"""
+    schema = """
+        CREATE TABLE IF NOT EXISTS posts (
+            post_id INTEGER PRIMARY KEY,
+            title_hash TEXT NOT NULL,
+            source_url TEXT
+        );
+        CREATE TABLE IF NOT EXISTS index_meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        );
+    """
+    
+    def __init__(self, path=':memory:'):
+        super().__init__(path)
+        
+        # Conjuntos en memoria para consultas O(1)
+        self.title_hashes = set()
+        self.source_urls = set()
+        with self.lock:
+            for title_hash, source_url in self.conn.execute('SELECT title_hash, source_url FROM posts'):
+                self.title_hashes.add(title_hash)
+                if source_url:
+                    self.source_urls.add(source_url)
+    
+    def __len__(self):
+        return len(self.title_hashes)
+    
+    def contains(self, title, source_url=None):
+        """Indica si ya existe un post con el mismo título o la misma URL de origen"""
+        if source_url and normalize_url(source_url) in self.source_urls:
+            return True
+        return title_fingerprint(title) in self.title_hashes
+    
+    def add(self, post_id, title, source_url=None):
+        """Agrega un post al índice"""
+        title_hash = title_fingerprint(title)
+        source_key = normalize_url(source_url) if source_url else None
+        
+        with self.lock:
+            self.title_hashes.add(title_hash)
+            if source_key:
+                self.source_urls.add(source_key)
+            self.conn.execute(
+                'INSERT OR REPLACE INTO posts (post_id, title_hash, source_url) VALUES (?, ?, ?)',
+                (post_id, title_hash, source_key)
+            )
+            self.conn.commit()
+    
+    def get_post_id(self, source_url):
+        """ID del post publicado desde una URL de origen, o None"""
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT post_id FROM posts WHERE source_url = ?', (normalize_url(source_url),)
+            ).fetchone()
+        return row[0] if row else None
+    
+    def get_meta(self, key):
+        """Obtiene un valor de metadatos del índice"""
+        with self.lock:
+            row = self.conn.execute('SELECT value FROM index_meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+    
+    def set_meta(self, key, value):
+        """Guarda un valor de metadatos del índice"""
+        with self.lock:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO index_meta (key, value) VALUES (?, ?)', (key, value)
+            )
+            self.conn.commit()
+
+
+class PostRevisionIndex(SQLiteStore):
+    """Hash de cada campo publicado por URL de origen, para actualizar solo lo que cambió"""
+    schema = """
+        CREATE TABLE IF NOT EXISTS revisions (
+            source_url TEXT PRIMARY KEY,
+            post_id INTEGER NOT NULL,
+            hashes TEXT NOT NULL,
+            updated_at REAL NOT NULL
+        );
+    """
+    
+    # Campo de la noticia → campo del post en WordPress
+    FIELDS = {'title': 'title', 'subtitle': 'excerpt', 'content': 'content', 'main_image': 'featured_media'}
+    
+    @classmethod
+    def field_hashes(cls, article_data):
+        """Hash de cada campo publicable de una noticia"""
+        return {
+            field: hashlib.sha1((article_data.get(field) or '').encode('utf-8')).hexdigest()
+            for field in cls.FIELDS
+        }
+    
+    def get(self, source_url):
+        """Retorna (post_id, hashes) de una URL de origen, o None"""
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT post_id, hashes FROM revisions WHERE source_url = ?', (normalize_url(source_url),)
+            ).fetchone()
+        return (row[0], json.loads(row[1])) if row else None
+    
+    def record(self, source_url, post_id, hashes):
+        """Guarda los hashes de lo publicado para una URL de origen"""
+        with self.lock:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO revisions (source_url, post_id, hashes, updated_at) VALUES (?, ?, ?, ?)',
+                (normalize_url(source_url), post_id, json.dumps(hashes), time.time())
+            )
+            self.conn.commit()
+
+
+class PublishOutbox(SQLiteStore):
+    """Cola durable de publicaciones pendientes: sobrevive a errores y a procesos interrumpidos"""
+    schema = """
+        CREATE TABLE IF NOT EXISTS outbox (
+            source_url TEXT PRIMARY KEY,
+            article TEXT NOT NULL,
+            media_id INTEGER,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL DEFAULT 0,
+            last_error TEXT,
+            created_at REAL NOT NULL
+        );
+    """
+    
+    def __init__(self, path, max_attempts=8, backoff=300, max_backoff=24 * 3600):
+        super().__init__(path)
+        self.max_attempts = max(1, max_attempts)
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        
+        # WAL: cada escritura queda en disco sin bloquear las lecturas
+        with self.lock:
+            self.conn.execute('PRAGMA journal_mode=WAL')
+            self.conn.execute('PRAGMA synchronous=NORMAL')
+    
+    def enqueue(self, article_data):
+        """Agrega una noticia por publicar (si ya estaba, conserva sus intentos e imagen)"""
+        article = {key: value for key, value in article_data.items() if key != 'media_id'}
+        with self.lock:
+            self.conn.execute(
+                'INSERT OR IGNORE INTO outbox (source_url, article, created_at) VALUES (?, ?, ?)',
+                (normalize_url(article_data['url']), json.dumps(article, ensure_ascii=False), time.time())
+            )
+            self.conn.commit()
+    
+    def set_media(self, source_url, media_id):
+        """Guarda la imagen ya subida para no volver a subirla en un reintento"""
+        with self.lock:
+            self.conn.execute('UPDATE outbox SET media_id = ? WHERE source_url = ?',
+                              (media_id, normalize_url(source_url)))
+            self.conn.commit()
+    
+    def complete(self, source_url):
+        """Quita una noticia publicada (o que ya existía) de la cola"""
+        with self.lock:
+            self.conn.execute('DELETE FROM outbox WHERE source_url = ?', (normalize_url(source_url),))
+            self.conn.commit()
+    
+    def fail(self, source_url, error):
+        """Registra un intento fallido y programa el siguiente con backoff exponencial"""
+        key = normalize_url(source_url)
+        with self.lock:
+            row = self.conn.execute('SELECT attempts FROM outbox WHERE source_url = ?', (key,)).fetchone()
+            if row is None:
+                return
+            attempts = row[0] + 1
+            delay = min(self.max_backoff, self.backoff * (2 ** (attempts - 1)))
+            self.conn.execute(
+                'UPDATE outbox SET attempts = ?, next_attempt_at = ?, last_error = ? WHERE source_url = ?',
+                (attempts, time.time() + delay, str(error)[:500], key)
+            )
+            self.conn.commit()
+    
+    def due(self):
+        """Noticias cuyo próximo intento ya venció, con la imagen subida si la hay"""
+        with self.lock:
+            rows = self.conn.execute(
+                'SELECT article, media_id FROM outbox WHERE attempts < ? AND next_attempt_at <= ? '
+                'ORDER BY created_at', (self.max_attempts, time.time())
+            ).fetchall()
+        
+        articles = []
+        for article, media_id in rows:
+            article_data = json.loads(article)
+            if media_id:
+                article_data['media_id'] = media_id
+            articles.append(article_data)
+        return articles
+    
+    def contains(self, source_url):
+        """Indica si la noticia espera un reintento en la cola (las agotadas no cuentan)"""
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT 1 FROM outbox WHERE source_url = ? AND attempts < ?',
+                (normalize_url(source_url), self.max_attempts)
+            ).fetchone()
+        return row is not None
+    
+    def counts(self):
+        """Retorna (pendientes, agotadas)"""
+        with self.lock:
+            pending, dead = self.conn.execute(
+                'SELECT COALESCE(SUM(attempts < ?), 0), COALESCE(SUM(attempts >= ?), 0) FROM outbox',
+                (self.max_attempts, self.max_attempts)
+            ).fetchone()
+        return pending, dead
+
+
+class NearDuplicateIndex(SQLiteStore):
+    """Firmas MinHash de las noticias publicadas, con búsqueda por bandas que no recorre el historial"""
+    schema = """
+        CREATE TABLE IF NOT EXISTS signatures (
+            id INTEGER PRIMARY KEY,
+            post_id INTEGER,
+            source_url TEXT,
+            signature BLOB NOT NULL,
+            created_at REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS bands (
+            band INTEGER NOT NULL,
+            value INTEGER NOT NULL,
+            signature_id INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS bands_lookup ON bands (band, value);
+    """
+    
+    def __init__(self, path=':memory:', threshold=0.8, window_days=30):
+        super().__init__(path)
+        self.threshold = threshold
+        
+        # Firmas de noticias aprobadas en esta ejecución que aún no se publican
+        self.pending = {}
+        
+        self.prune(window_days)
+    
+    @staticmethod
+    def band_values(signature):
+        """Un valor por banda (hash de sus filas); firmas parecidas coinciden en alguna banda"""
+        rows = MINHASH_PERMUTATIONS // MINHASH_BANDS
+        values = []
+        for band in range(MINHASH_BANDS):
+            chunk = b''.join(value.to_bytes(8, 'big') for value in signature[band * rows:(band + 1) * rows])
+            values.append(stable_hash(chunk) >> 1)  # Cabe en un entero con signo de SQLite
+        return values
+    
+    @staticmethod
+    def pack(signature):
+        return b''.join(value.to_bytes(8, 'big') for value in signature)
+    
+    @staticmethod
+    def unpack(blob):
+        return [int.from_bytes(blob[i:i + 8], 'big') for i in range(0, len(blob), 8)]
+    
+    @staticmethod
+    def similarity(first, second):
+        """Similitud de Jaccard estimada entre dos firmas"""
+        return sum(1 for a, b in zip(first, second) if a == b) / MINHASH_PERMUTATIONS
+    
+    def prune(self, window_days):
+        """Elimina las firmas más antiguas que la ventana"""
+        cutoff = time.time() - window_days * 86400
+        with self.lock:
+            self.conn.execute('DELETE FROM signatures WHERE created_at < ?', (cutoff,))
+            self.conn.execute('DELETE FROM bands WHERE signature_id NOT IN (SELECT id FROM signatures)')
+            self.conn.commit()
+    
+    def nearest(self, signature, source_url):
+        """Noticia más parecida sobre el umbral (requiere el lock tomado)"""
+        clause = ' OR '.join('(b.band = ? AND b.value = ?)' for _ in range(MINHASH_BANDS))
+        params = [item for pair in enumerate(self.band_values(signature)) for item in pair]
+        rows = self.conn.execute(
+            'SELECT DISTINCT s.post_id, s.source_url, s.signature FROM bands b '
+            f'JOIN signatures s ON s.id = b.signature_id WHERE {clause}', params
+        ).fetchall()
+        
+        candidates = [(post_id, url, self.unpack(blob)) for post_id, url, blob in rows]
+        candidates.extend((None, url, other) for url, other in self.pending.items())
+        
+        best = None
+        for post_id, url, other in candidates:
+            # La misma noticia no es casi duplicado de sí misma
+            if source_url and url == source_url:
+                continue
+            similarity = self.similarity(signature, other)
+            if similarity >= self.threshold and (best is None or similarity > best['similarity']):
+                best = {'post_id': post_id, 'source_url': url, 'similarity': similarity}
+        return best
+    
+    def find_or_reserve(self, source_url, title, content):
+        """Retorna la noticia casi idéntica ya publicada (o en curso); si no hay, reserva la firma"""
+        signature = minhash(f"{title} {content}")
+        if signature is None:
+            return None
+        
+        with self.lock:
+            match = self.nearest(signature, source_url)
+            if match is None and source_url:
+                self.pending[source_url] = signature
+        return match
+    
+    def add(self, post_id, source_url, title, content):
+        """Registra la firma de un post publicado"""
+        with self.lock:
+            signature = self.pending.pop(source_url, None)
+        if signature is None:
+            signature = minhash(f"{title} {content}")
+        if signature is None:
+            return
+        
+        with self.lock:
+            cursor = self.conn.execute(
+                'INSERT INTO signatures (post_id, source_url, signature, created_at) VALUES (?, ?, ?, ?)',
+                (post_id, source_url, self.pack(signature), time.time())
+            )
+            self.conn.executemany(
+                'INSERT INTO bands (band, value, signature_id) VALUES (?, ?, ?)',
+                [(band, value, cursor.lastrowid) for band, value in enumerate(self.band_values(signature))]
+            )
+            self.conn.commit()
+    
+    def release(self, source_url):
+        """Libera la reserva de una noticia que no se llegó a publicar"""
+        with self.lock:
+            self.pending.pop(source_url, None)
+
+
+class MediaIndex(SQLiteStore):
+    """Índice local de imágenes subidas: SHA-256 y URL de origen → ID de media en WordPress"""
+    schema = """
+        CREATE TABLE IF NOT EXISTS media (
+            sha256 TEXT PRIMARY KEY,
+            media_id INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS media_sources (
+            source_url TEXT PRIMARY KEY,
+            sha256 TEXT NOT NULL
+        );
+    """
+    
+    def get_by_url(self, source_url):
+        """ID de media de una imagen ya subida desde esta URL"""
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT m.media_id FROM media_sources s JOIN media m ON m.sha256 = s.sha256 '
+                'WHERE s.source_url = ?', (source_url,)
+            ).fetchone()
+        return row[0] if row else None
+    
+    def get_by_hash(self, sha256):
+        """ID de media de una imagen ya subida con este contenido"""
+        with self.lock:
+            row = self.conn.execute('SELECT media_id FROM media WHERE sha256 = ?', (sha256,)).fetchone()
+        return row[0] if row else None
+    
+    def add(self, source_url, sha256, media_id):
+        """Registra una imagen subida"""
+        with self.lock:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO media (sha256, media_id) VALUES (?, ?)', (sha256, media_id)
+            )
+            self.conn.execute(
+                'INSERT OR REPLACE INTO media_sources (source_url, sha256) VALUES (?, ?)',
+                (source_url, sha256)
+            )
+            self.conn.commit()
+
+
+# Versión del formato de los resultados procesados: subirla invalida los guardados en la cache HTTP
+DERIVED_CACHE_VERSION = 1
+
+
+class HttpCache(SQLiteStore):
+    """Cache HTTP en disco con validadores ETag/Last-Modified y resultados ya procesados"""
+    schema = """
+        CREATE TABLE IF NOT EXISTS responses (
+            url TEXT PRIMARY KEY,
+            etag TEXT,
+            last_modified TEXT,
+            body BLOB NOT NULL,
+            size INTEGER NOT NULL,
+            stored_at REAL NOT NULL,
+            accessed_at REAL NOT NULL,
+            derived TEXT
+        );
+    """
+    
+    def __init__(self, path, max_bytes=50 * 1024 * 1024, max_age=72 * 3600):
+        super().__init__(path)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.stats = {'hits': 0, 'misses': 0, 'evicted': 0}
+    
+    def conditional_headers(self, url):
+        """Retorna los headers If-None-Match/If-Modified-Since para una URL"""
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT etag, last_modified FROM responses WHERE url = ?', (url,)
+            ).fetchone()
+        
+        headers = {}
+        if row:
+            if row[0]:
+                headers['If-None-Match'] = row[0]
+            if row[1]:
+                headers['If-Modified-Since'] = row[1]
+        return headers
+    
+    def hit(self, url, fingerprint=None):
+        """Registra un 304 y retorna el cuerpo y el resultado procesado (si se generó con la misma huella)"""
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT body, derived FROM responses WHERE url = ?', (url,)
+            ).fetchone()
+            if not row:
+                return None
+            
+            # Un 304 confirma que la copia sigue vigente: cuenta como guardada de nuevo
+            now = time.time()
+            self.conn.execute(
+                'UPDATE responses SET accessed_at = ?, stored_at = ? WHERE url = ?', (now, now, url)
+            )
+            self.conn.commit()
+            self.stats['hits'] += 1
+        
+        # Un resultado de otras reglas o de otro parser se descarta y la página se vuelve a procesar
+        derived = json.loads(row[1]) if row[1] else None
+        if not isinstance(derived, dict) or derived.get('fingerprint') != fingerprint:
+            return {'body': row[0], 'derived': None}
+        return {'body': row[0], 'derived': derived['data']}
+    
+    def miss(self, url, response):
+        """Registra una respuesta completa y la guarda si trae validadores"""
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        
+        with self.lock:
+            self.stats['misses'] += 1
+            
+            if response.status_code != 200 or not (etag or last_modified):
+                self.conn.execute('DELETE FROM responses WHERE url = ?', (url,))
+                self.conn.commit()
+                return
+            
+            now = time.time()
+            body = response.content
+            self.conn.execute(
+                'INSERT OR REPLACE INTO responses '
+                '(url, etag, last_modified, body, size, stored_at, accessed_at, derived) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, NULL)',
+                (url, etag, last_modified, body, len(body), now, now)
+            )
+            self.conn.commit()
+    
+    def set_derived(self, url, data, fingerprint=None):
+        """Guarda el resultado procesado de una URL, con la huella de cómo se generó, para reutilizarlo ante un 304"""
+        with self.lock:
+            self.conn.execute(
+                'UPDATE responses SET derived = ? WHERE url = ?',
+                (json.dumps({'fingerprint': fingerprint, 'data': data}, ensure_ascii=False), url)
+            )
+            self.conn.commit()
+    
+    def summary(self):
+        """Resumen de aciertos y fallos de la ejecución"""
+        return (f"Cache HTTP: {self.stats['hits']} aciertos, {self.stats['misses']} fallos, "
+                f"{self.stats['evicted']} desalojadas")
+    
+    def evict(self):
+        """Elimina entradas sin validar en max_age y las menos usadas si se supera el tamaño máximo"""
+        with self.lock:
+            cursor = self.conn.execute(
+                'DELETE FROM responses WHERE stored_at < ?', (time.time() - self.max_age,)
+            )
+            evicted = cursor.rowcount
+            
+            total = self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+            if total > self.max_bytes:
+                rows = self.conn.execute(
+                    'SELECT url, size FROM responses ORDER BY accessed_at ASC'
+                ).fetchall()
+                for url, size in rows:
+                    if total <= self.max_bytes:
+                        break
+                    self.conn.execute('DELETE FROM responses WHERE url = ?', (url,))
+                    total -= size
+                    evicted += 1
+            
+            self.conn.commit()
+            self.stats['evicted'] += evicted
+        return evicted
+
+
+class TokenBucket:
+    """Limitador de tasa tipo token bucket, seguro entre hilos"""
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity) if capacity else max(1.0, self.rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def acquire(self):
+        """Espera hasta que haya un token disponible y lo consume"""
+        if self.rate <= 0:
+            return
+        
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                
+                wait = (1 - self.tokens) / self.rate
+            
+            time.sleep(wait)
+
+
+# Muestras que se conservan por serie para estimar percentiles (la memoria no crece en modo continuo)
+RESERVOIR_SIZE = 1024
+
+
+class SampleReservoir:
+    """Duraciones de una serie: cantidad, suma y máximo exactos, y percentiles sobre una muestra acotada"""
+    def __init__(self, size=RESERVOIR_SIZE):
+        self.size = size
+        self.samples = []
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.random = random.Random()
+    
+    def add(self, value):
+        """Agrega una duración (muestreo de reservorio: cada valor tiene la misma probabilidad de quedar)"""
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        if len(self.samples) < self.size:
+            self.samples.append(value)
+        else:
+            index = self.random.randrange(self.count)
+            if index < self.size:
+                self.samples[index] = value
+    
+    def summary(self):
+        """Resumen (cantidad, suma, promedio, p50, p95, p99 y máximo)"""
+        ordered = sorted(self.samples)
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'avg': self.sum / self.count,
+            'p50': ordered[int(0.50 * (len(ordered) - 1))],
+            'p95': ordered[int(0.95 * (len(ordered) - 1))],
+            'p99': ordered[int(0.99 * (len(ordered) - 1))],
+            'max': self.max
+        }
+
+
+class Metrics:
+    """Métricas de una ejecución (duraciones por etapa, contadores y gauges), seguro entre hilos"""
+    PREFIX = 'sync_news'
+    
     def __init__(self):
+        self.timings = {}
+        self.counters = {}
+        self.gauges = {}
+        self.lock = threading.Lock()
+    
+    @staticmethod
+    def key(name, labels):
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+    
+    def observe(self, name, seconds, **labels):
+        """Registra una duración en segundos"""
+        with self.lock:
+            key = self.key(name, labels)
+            if key not in self.timings:
+                self.timings[key] = SampleReservoir()
+            self.timings[key].add(seconds)
+    
+    def count(self, name, value=1, **labels):
+        """Suma a un contador"""
+        with self.lock:
+            key = self.key(name, labels)
+            self.counters[key] = self.counters.get(key, 0) + value
+    
+    def gauge(self, name, value, **labels):
+        """Fija el valor de un gauge"""
+        with self.lock:
+            self.gauges[self.key(name, labels)] = value
+    
+    @contextmanager
+    def span(self, name, **labels):
+        """Mide la duración del bloque (también si termina con una excepción)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+    
+    def record_http(self, endpoint, elapsed, status, bytes_in=0, bytes_out=0, **labels):
+        """Registra un intento de llamada HTTP: duración, estado y bytes transferidos"""
+        self.observe('http_request', elapsed, endpoint=endpoint, **labels)
+        self.count('http_requests', endpoint=endpoint, status=status, **labels)
+        if bytes_in:
+            self.count('http_bytes', bytes_in, endpoint=endpoint, direction='in', **labels)
+        if bytes_out:
+            self.count('http_bytes', bytes_out, endpoint=endpoint, direction='out', **labels)
+    
+    def timing_stats(self, name):
+        """Resumen de las duraciones de una métrica, agrupadas por etiquetas"""
+        with self.lock:
+            return {labels: series.summary() for (metric, labels), series in self.timings.items()
+                    if metric == name}
+    
+    def records(self):
+        """Todas las series como diccionarios (una por combinación de nombre y etiquetas)"""
+        with self.lock:
+            timings = {key: series.summary() for key, series in self.timings.items()}
+            counters = dict(self.counters)
+            gauges = dict(self.gauges)
+        
+        records = []
+        for (name, labels), summary in sorted(timings.items()):
+            records.append({'type': 'timing', 'name': name, 'labels': dict(labels), **summary})
+        for (name, labels), value in sorted(counters.items()):
+            records.append({'type': 'counter', 'name': name, 'labels': dict(labels), 'value': value})
+        for (name, labels), value in sorted(gauges.items()):
+            records.append({'type': 'gauge', 'name': name, 'labels': dict(labels), 'value': value})
+        return records
+    
+    def export_json_lines(self, path):
+        """Agrega las métricas al archivo, una línea JSON por serie"""
+        timestamp = datetime.now(timezone.utc).isoformat()
+        with open(path, 'a', encoding='utf-8') as f:
+            for record in self.records():
+                f.write(json.dumps({'ts': timestamp, **record}, ensure_ascii=False) + '\n')
+    
+    @staticmethod
+    def prometheus_labels(labels, **extra):
+        """Etiquetas en formato Prometheus: {clave="valor",...}"""
+        labels = {**labels, **extra}
+        if not labels:
+            return ''
+        pairs = []
+        for name, value in labels.items():
+            value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+            pairs.append(f'{name}="{value}"')
+        return '{' + ','.join(pairs) + '}'
+    
+    def export_prometheus(self, path):
+        """Escribe las métricas en formato textfile de Prometheus (reemplazo atómico)"""
+        lines = []
+        declared = set()
+        
+        def declare(metric, metric_type):
+            if metric not in declared:
+                declared.add(metric)
+                lines.append(f"# TYPE {metric} {metric_type}")
+        
+        for record in self.records():
+            labels = record['labels']
+            if record['type'] == 'timing':
+                metric = f"{self.PREFIX}_{record['name']}_seconds"
+                declare(metric, 'summary')
+                for quantile, field in (('0.5', 'p50'), ('0.95', 'p95'), ('0.99', 'p99')):
+                    lines.append(f"{metric}{self.prometheus_labels(labels, quantile=quantile)} {record[field]:.6f}")
+                lines.append(f"{metric}_sum{self.prometheus_labels(labels)} {record['sum']:.6f}")
+                lines.append(f"{metric}_count{self.prometheus_labels(labels)} {record['count']}")
+            elif record['type'] == 'counter':
+                metric = f"{self.PREFIX}_{record['name']}_total"
+                declare(metric, 'counter')
+                lines.append(f"{metric}{self.prometheus_labels(labels)} {record['value']}")
+            else:
+                metric = f"{self.PREFIX}_{record['name']}"
+                declare(metric, 'gauge')
+                lines.append(f"{metric}{self.prometheus_labels(labels)} {record['value']}")
+        
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        os.replace(temp_path, path)
+    
+    def export(self, path, fmt=None):
+        """Exporta a JSON lines o Prometheus (por defecto según la extensión: .prom → Prometheus)"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        fmt = fmt or ('prometheus' if path.endswith('.prom') else 'jsonl')
+        if fmt == 'prometheus':
+            self.export_prometheus(path)
+        else:
+            self.export_json_lines(path)
+
+
+class NewsUrlClassifier:
+    """Clasificador precompilado de enlaces de noticias, con memo de veredictos"""
+    EXCLUDE_PATTERNS = [
+        'embed_', 'javascript:', '#', 'mailto:', 'tel:', '/cms/imag/',
+        '.jpg', '.png', '.gif', '.webp', '.pdf', '.doc', '.xlsx',
+        'facebook.com', 'twitter.com', 'instagram.com', 'whatsapp.com',
+        'linkedin.com', '/tax/', '/cms/site/tax/'
+    ]
+    
+    def __init__(self, base_url, category_rules=None, cache_size=4096):
+        self.base_url = base_url
+        self.base_host = urlparse(base_url).netloc
+        
+        # Una sola expresión con todos los patrones: una pasada por URL
+        self.exclude_re = re.compile('|'.join(re.escape(p) for p in self.EXCLUDE_PATTERNS))
+        
+        # Reglas adicionales por categoría: {'Deportes': {'include': [...], 'exclude': [...]}}
+        self.category_rules = {}
+        for category, rules in (category_rules or {}).items():
+            self.category_rules[category] = {
+                kind: re.compile('|'.join(f'(?:{pattern})' for pattern in rules[kind]))
+                for kind in ('include', 'exclude') if rules.get(kind)
+            }
+        
+        self.is_valid = lru_cache(maxsize=cache_size)(self.classify)
+    
+    def classify(self, url):
+        """Valida si una URL es de una noticia válida (sin memo)"""
+        if self.exclude_re.search(url.lower()):
+            return False
+        
+        # Debe ser una URL interna significativa
+        if url.startswith('/') and len(url) > 15:
+            return True
+        elif self.base_host in url and len(url) > 50:
+            return True
+        
+        return False
+    
+    def resolve(self, href):
+        """Convierte un enlace en URL absoluta; None si no es http(s) ni relativo a la raíz"""
+        if href.startswith('/'):
+            return self.base_url + href
+        elif href.startswith('http'):
+            return href
+        return None
+    
+    def matches_category(self, url, category):
+        """Aplica las reglas de inclusión/exclusión de una categoría sobre la URL normalizada"""
+        rules = self.category_rules.get(category)
+        if not rules:
+            return True
+        
+        key = normalize_url(url)
+        if 'include' in rules and not rules['include'].search(key):
+            return False
+        if 'exclude' in rules and rules['exclude'].search(key):
+            return False
+        return True
+
+
+# Tamaño de bloque con que se entregan los feeds al parser incremental
+FEED_CHUNK_SIZE = 16 * 1024
+
+
+class FeedDiscovery:
+    """Descubre noticias desde feeds RSS/Atom o sitemaps de noticias, con marca de agua por categoría"""
+    ITEM_TAGS = {'item', 'entry', 'url'}
+    
+    # Fechas en orden de preferencia (sitemap de noticias, Atom, RSS, Dublin Core, modificación)
+    DATE_TAGS = ('publication_date', 'published', 'pubDate', 'date', 'updated', 'lastmod')
+    
+    def __init__(self, feeds, path=None, max_items=200):
+        # {'Nacional': 'https://...'} o {'Nacional': ['https://...', ...]}
+        self.feeds = {
+            category: [urls] if isinstance(urls, str) else list(urls)
+            for category, urls in feeds.items()
+        }
+        self.path = path
+        self.max_items = max(1, max_items)
+        self.lock = threading.Lock()
+        self.watermarks = self.load()
+        
+        # Noticias entregadas y aún no sincronizadas, y timestamps ya sincronizados, por categoría
+        self.pending = {}
+        self.pending_category = {}
+        self.synced = {}
+    
+    def load(self):
+        """Carga las marcas de agua guardadas (timestamp de la última noticia por categoría)"""
+        if not self.path:
+            return {}
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def save(self):
+        """Guarda las marcas de agua de forma atómica"""
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.watermarks, f, ensure_ascii=False)
+        os.replace(temp_path, self.path)
+    
+    @staticmethod
+    def local_name(tag):
+        """Nombre de un tag sin su espacio de nombres"""
+        return tag.rsplit('}', 1)[-1]
+    
+    def parse(self, content):
+        """Lee un feed por bloques y retorna [(enlace, timestamp o None)] en el orden del documento"""
+        parser = ElementTree.XMLPullParser(events=('end',))
+        items = []
+        
+        for start in range(0, len(content), FEED_CHUNK_SIZE):
+            parser.feed(content[start:start + FEED_CHUNK_SIZE])
+            for _, element in parser.read_events():
+                if self.local_name(element.tag) not in self.ITEM_TAGS:
+                    continue
+                
+                link, published = self.parse_item(element)
+                element.clear()
+                if link:
+                    items.append((link, published))
+                    # Los feeds largos no se terminan de leer
+                    if len(items) >= self.max_items:
+                        return items
+        
+        parser.close()
+        return items
+    
+    def parse_item(self, element):
+        """Extrae (enlace, timestamp) de un <item> RSS, <entry> Atom o <url> de sitemap"""
+        link = None
+        dates = {}
+        for child in element.iter():
+            name = self.local_name(child.tag)
+            if name == 'loc' and link is None:
+                link = (child.text or '').strip()
+            elif name == 'link' and link is None:
+                # Atom usa href (rel="alternate" por omisión), RSS el texto del tag
+                if child.get('href'):
+                    if child.get('rel', 'alternate') == 'alternate':
+                        link = child.get('href').strip()
+                else:
+                    link = (child.text or '').strip()
+            elif name in self.DATE_TAGS:
+                dates.setdefault(name, child.text)
+        
+        published = next((timestamp for timestamp in (parse_feed_date(dates.get(tag)) for tag in self.DATE_TAGS)
+                          if timestamp is not None), None)
+        return link or None, published
+    
+    def select(self, category, items, limit, use_watermark=True):
+        """Las noticias más recientes posteriores a la marca de agua (las sin fecha van al final)"""
+        watermark = self.watermarks.get(category) if use_watermark else None
+        if watermark is not None:
+            items = [item for item in items if item[1] is None or item[1] > watermark]
+        return sorted(items, key=lambda item: -(item[1] or 0))[:limit]
+    
+    def track(self, category, items):
+        """Registra las noticias seleccionadas; la marca de agua no las pasa hasta que se sincronicen"""
+        with self.lock:
+            pending = self.pending.setdefault(category, {})
+            for url, published in items:
+                if published is not None:
+                    pending[url] = published
+                    self.pending_category[url] = category
+    
+    def confirm(self, url):
+        """Una noticia quedó sincronizada (publicada o ya existente): avanza la marca de agua sin dejar pendientes atrás"""
+        with self.lock:
+            category = self.pending_category.pop(url, None)
+            if category is None:
+                return
+            
+            synced = self.synced.setdefault(category, [])
+            synced.append(self.pending[category].pop(url))
+            cutoff = min(self.pending[category].values(), default=None)
+            candidates = [published for published in synced if cutoff is None or published < cutoff]
+            if not candidates or max(candidates) <= self.watermarks.get(category, 0):
+                return
+            
+            self.watermarks[category] = max(candidates)
+            self.synced[category] = [published for published in synced if published > self.watermarks[category]]
+            self.save()
+
+
+# Selectores simples de las reglas de contenido: tag, .clase, #id, [atributo] y [atributo=valor]
+SIMPLE_SELECTOR_RE = re.compile(r'(?P<name>[\w-]+|\*)?(?P<rest>(?:[.#][\w-]+|\[[\w-]+(?:=[^\]]*)?\])*)')
+SELECTOR_PART_RE = re.compile(r'\.([\w-]+)|#([\w-]+)|\[([\w-]+)(?:=([^\]]*))?\]')
+
+
+class SimpleSelector:
+    """Selector CSS simple que se evalúa sobre un solo elemento (sin recorrer el árbol)"""
+    def __init__(self, selector):
+        match = SIMPLE_SELECTOR_RE.fullmatch(selector.strip())
+        if not match or not selector.strip():
+            raise ValueError(f"Selector no soportado: {selector!r}")
+        
+        self.name = match.group('name') or '*'
+        self.classes = set()
+        self.attrs = []
+        for class_name, element_id, attr, value in SELECTOR_PART_RE.findall(match.group('rest')):
+            if class_name:
+                self.classes.add(class_name)
+            elif element_id:
+                self.attrs.append(('id', element_id))
+            else:
+                self.attrs.append((attr, value.strip('"\'') if value else None))
+    
+    def matches(self, tag):
+        """Indica si el elemento cumple el selector"""
+        if self.classes and not self.classes.issubset(tag.get('class') or ()):
+            return False
+        for attr, value in self.attrs:
+            actual = tag.get(attr)
+            if actual is None:
+                return False
+            if value is not None:
+                actual = ' '.join(actual) if isinstance(actual, list) else actual
+                if actual != value:
+                    return False
+        return True
+
+
+class SelectorSet:
+    """Conjunto de selectores simples indexado por nombre de tag"""
+    def __init__(self, selectors):
+        self.by_name = {}
+        for selector in selectors:
+            compiled = SimpleSelector(selector)
+            self.by_name.setdefault(compiled.name, []).append(compiled)
+    
+    def __bool__(self):
+        return bool(self.by_name)
+    
+    def matches(self, tag):
+        """Indica si el elemento cumple alguno de los selectores"""
+        return any(selector.matches(tag)
+                   for selector in self.by_name.get(tag.name, []) + self.by_name.get('*', []))
+
+
+class ContentTransformer:
+    """Limpia y serializa el cuerpo de un artículo en un solo recorrido, según reglas declarativas"""
+    DEFAULT_RULES = {
+        # Bloques de publicidad y navegación que se eliminan
+        'remove': ['div.ad-pnt-slot', 'div.subtitulos', 'div.anclas', 'div.banner-plain'],
+        # Elementos que se eliminan si su texto contiene alguna de las marcas (sin distinguir mayúsculas)
+        'remove_text': [{'selector': 'blockquote', 'markers': ['LEER TAMBIÉN', 'LEER TAMBIEN']}],
+        # Atributos con rutas relativas a la raíz que se convierten en URLs absolutas
+        'absolute_urls': {'img': ['src', 'srcset'], 'source': ['srcset'], 'a': ['href']},
+        # Atributos de carga diferida que reemplazan al atributo real
+        'lazy_attributes': {'data-src': 'src', 'data-lazy-src': 'src', 'data-srcset': 'srcset'}
+    }
+    
+    # Textos que cuentan para las marcas (los mismos que get_text: sin comentarios ni scripts)
+    TEXT_TYPES = (NavigableString, CData)
+    
+    def __init__(self, base_url, rules=None):
+        self.base_url = base_url
+        rules = {**self.DEFAULT_RULES, **(rules or {})}
+        
+        # Huella de las reglas: los artículos en cache procesados con otras reglas no se reutilizan
+        self.fingerprint = hashlib.sha256(
+            json.dumps(rules, sort_keys=True, ensure_ascii=False).encode('utf-8')
+        ).hexdigest()[:16]
+        
+        self.remove = SelectorSet(rules.get('remove') or [])
+        self.remove_text = [
+            (SelectorSet([rule['selector']]), [marker.upper() for marker in rule['markers']])
+            for rule in rules.get('remove_text') or []
+        ]
+        self.absolute_urls = {name: set(attrs) for name, attrs in (rules.get('absolute_urls') or {}).items()}
+        self.lazy_attributes = dict(rules.get('lazy_attributes') or {})
+    
+    @classmethod
+    def from_file(cls, base_url, path):
+        """Crea el transformador con reglas leídas de un archivo JSON (se combinan con las por omisión)"""
+        with open(path, encoding='utf-8') as f:
+            return cls(base_url, json.load(f))
+    
+    def absolute_url(self, value):
+        """Convierte una ruta relativa a la raíz en URL absoluta"""
+        value = value.strip()
+        if value.startswith('/') and not value.startswith('//'):
+            return self.base_url + value
+        return value
+    
+    def rewrite_attrs(self, tag):
+        """Atributos de salida: carga diferida resuelta y URLs absolutas (sin modificar el árbol)"""
+        attrs = dict(tag.attrs)
+        
+        for lazy_attr, target in self.lazy_attributes.items():
+            if attrs.get(lazy_attr):
+                attrs[target] = attrs.pop(lazy_attr)
+        
+        for attr in self.absolute_urls.get(tag.name, ()):
+            value = attrs.get(attr)
+            if not isinstance(value, str):
+                continue
+            if attr.endswith('srcset'):
+                attrs[attr] = ', '.join(
+                    ' '.join([self.absolute_url(url), *descriptor])
+                    for url, *descriptor in (candidate.split() for candidate in value.split(',') if candidate.strip())
+                )
+            else:
+                attrs[attr] = self.absolute_url(value)
+        return attrs
+    
+    def start_tag(self, tag, formatter):
+        """Tag de apertura con el mismo formato que str() de BeautifulSoup"""
+        parts = []
+        # BeautifulSoup ordena los atributos alfabéticamente
+        for key, value in sorted(self.rewrite_attrs(tag).items()):
+            if value is None:
+                parts.append(key)
+                continue
+            if isinstance(value, (list, tuple)):
+                value = ' '.join(value)
+            parts.append(f"{key}={formatter.quoted_attribute_value(formatter.attribute_value(str(value)))}")
+        
+        prefix = f"{tag.prefix}:" if tag.prefix else ''
+        attributes = ' ' + ' '.join(parts) if parts else ''
+        void_slash = (getattr(formatter, 'void_element_close_prefix', '/') or '') if tag.is_empty_element else ''
+        return f"<{prefix}{tag.name}{attributes}{void_slash}>"
+    
+    def end_tag(self, tag):
+        """Tag de cierre (los elementos vacíos no llevan)"""
+        if tag.is_empty_element:
+            return ''
+        return f"</{tag.prefix + ':' if tag.prefix else ''}{tag.name}>"
+    
+    def stream(self, root):
+        """Genera el HTML transformado por partes; solo se retiene lo que está dentro de un elemento con marcas"""
+        formatter = root.formatter_for_name('minimal')
+        ready = []
+        
+        # Elementos con reglas de texto abiertos: (salida acumulada, textos, marcas)
+        captures = []
+        
+        def write(piece):
+            (captures[-1][0] if captures else ready).append(piece)
+        
+        write(self.start_tag(root, formatter))
+        stack = [(root, iter(root.contents), None)]
+        
+        while stack:
+            tag, children, capture = stack[-1]
+            child = next(children, None)
+            
+            if child is None:
+                stack.pop()
+                write(self.end_tag(tag))
+                if capture is not None:
+                    captures.pop()
+                    pieces, texts, markers = capture
+                    text = ''.join(texts).strip().upper()
+                    if not any(marker in text for marker in markers):
+                        for piece in pieces:
+                            write(piece)
+            
+            elif isinstance(child, NavigableString):
+                if type(child) in self.TEXT_TYPES:
+                    for _, texts, _ in captures:
+                        texts.append(child)
+                write(child.output_ready(formatter))
+            
+            elif isinstance(child, Tag) and not self.remove.matches(child):
+                # Un elemento con reglas de texto se acumula hasta saber si se conserva
+                markers = [marker for selectors, rule_markers in self.remove_text
+                           if selectors.matches(child) for marker in rule_markers]
+                capture = ([], [], markers) if markers else None
+                if capture is not None:
+                    captures.append(capture)
+                
+                write(self.start_tag(child, formatter))
+                stack.append((child, iter(child.contents), capture))
+            
+            if ready:
+                yield from ready
+                ready.clear()
+    
+    def transform(self, root):
+        """Retorna el HTML transformado de un elemento"""
+        return ''.join(self.stream(root))
+
+
+class PuraNoticiaExtractor:
+    def __init__(self, max_workers=1, max_per_host=4, requests_per_second=4.0, timeout=30,
+                 articles_per_category=1, seen_index=None, http_cache=None,
+                 parser='html.parser', fast_parse=True, category_rules=None, metrics=None,
+                 revisit_synced=False, feed_discovery=None, content_transformer=None):
         self.base_url = "https://puranoticia.pnt.cl"
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
         
+        # Concurrencia: hilos para categorías y límite de conexiones por host
+        self.max_workers = max(1, max_workers)
+        self.max_per_host = max(1, max_per_host)
+        self.timeout = timeout
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(self.max_workers, self.max_per_host))
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        
+        # Token bucket en lugar de la pausa fija entre requests
+        self.rate_limiter = TokenBucket(requests_per_second)
+        self.host_semaphores = {}
+        self.host_lock = threading.Lock()
+        
+        # Noticias a revisar por categoría e índice de URLs ya sincronizadas
+        self.articles_per_category = max(1, articles_per_category)
+        self.seen_index = seen_index
+        
+        # En modo actualización las noticias ya sincronizadas se vuelven a revisar
+        self.revisit_synced = revisit_synced
+        
+        # Cache HTTP condicional y descubrimiento por feeds (opcionales)
+        self.http_cache = http_cache
+        self.feed_discovery = feed_discovery
+        
+        # Outboxes de los destinos: lo que espera un reintento no se vuelve a extraer
+        self.outboxes = []
+        
+        # Motor de parseo y parseo acotado a las regiones que se usan
+        self.parser, self.soup_parser = resolve_html_parser(parser)
+        self.fast_parse = fast_parse
+        
+        # Clasificador de enlaces y reglas de limpieza del contenido, compilados una sola vez
+        self.url_classifier = NewsUrlClassifier(self.base_url, category_rules)
+        self.content_transformer = content_transformer or ContentTransformer(self.base_url)
+        
+        # Métricas de tiempos y transferencia
+        self.metrics = metrics or Metrics()
+        
         # Configuración de categorías
         self.categories = {
             'Nacional': 'https://puranoticia.pnt.cl/tax/nacional/p/1',
@@ -30,76 +1420,217 @@ class PuraNoticiaExtractor:
             'Negocios': 'https://puranoticia.pnt.cl/cms/site/tax/port/fid_noticia/embed_4___1.html'
         }
     
-    def extract_first_news_url(self, category_url):
-        """Extrae la URL de la primera noticia de una página de categoría"""
-        try:
-            response = self.session.get(category_url)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
+    def get_host_semaphore(self, url):
+        """Obtiene el semáforo que limita las conexiones simultáneas a un host"""
+        host = urlparse(url).netloc
+        with self.host_lock:
+            if host not in self.host_semaphores:
+                self.host_semaphores[host] = threading.BoundedSemaphore(self.max_per_host)
+            return self.host_semaphores[host]
+    
+    def fetch(self, url, headers=None):
+        """Descarga una URL respetando el límite por host y la tasa de requests"""
+        endpoint = f"GET {urlparse(url).netloc}"
+        with self.get_host_semaphore(url):
+            with self.metrics.span('rate_limit_wait', endpoint=endpoint):
+                self.rate_limiter.acquire()
             
-            # Buscar el primer enlace válido de noticia
-            links = soup.find_all('a', href=True)
+            started = time.perf_counter()
+            try:
+                response = self.session.get(url, timeout=self.timeout, headers=headers)
+            except requests.RequestException:
+                self.metrics.record_http(endpoint, time.perf_counter() - started, 'error')
+                raise
+            self.metrics.record_http(endpoint, time.perf_counter() - started,
+                                     response.status_code, len(response.content))
+        response.raise_for_status()
+        return response
+    
+    def fetch_page(self, url):
+        """Descarga una página usando la cache HTTP; retorna (contenido, resultado_cacheado)"""
+        if not self.http_cache:
+            return self.fetch(url).content, None
+        
+        response = self.fetch(url, headers=self.http_cache.conditional_headers(url))
+        
+        if response.status_code == 304:
+            entry = self.http_cache.hit(url, self.derived_fingerprint())
+            if entry:
+                return entry['body'], entry['derived']
+            # La entrada fue desalojada entre medio: pedir la página completa
+            response = self.fetch(url)
+        
+        self.http_cache.miss(url, response)
+        return response.content, None
+    
+    def derived_fingerprint(self):
+        """Huella del parser y las reglas con que se generan los resultados guardados en la cache"""
+        return (f"{DERIVED_CACHE_VERSION}:{self.parser}:{int(bool(self.fast_parse))}:"
+                f"{self.content_transformer.fingerprint}")
+    
+    def cache_result(self, url, data):
+        """Guarda el resultado procesado de una página en la cache HTTP"""
+        if self.http_cache:
+            self.http_cache.set_derived(url, data, self.derived_fingerprint())
+    
+    def fetch_news_urls(self, category_url, limit=1, category=None):
+        """Como extract_news_urls, pero propaga los errores de descarga"""
+        with self.metrics.span('category_fetch'):
+            content, news_urls = self.fetch_page(category_url)
+        
+        # Página sin cambios (304): reutilizar los enlaces ya extraídos
+        if news_urls is None:
+            with self.metrics.span('category_parse'):
+                news_urls = self.collect_news_urls(content, None if self.http_cache else limit)
             
-            for link in links:
-                href = link.get('href')
-                if href and self.is_valid_news_url(href):
-                    if href.startswith('/'):
-                        return self.base_url + href
-                    elif href.startswith('http'):
-                        return href
+            # Con cache se guardan todos los enlaces para no reprocesar la página
+            self.cache_result(category_url, news_urls)
+        
+        # Las reglas por categoría se aplican después de la cache
+        if category in self.url_classifier.category_rules:
+            news_urls = [url for url in news_urls
+                         if self.url_classifier.matches_category(url, category)]
+        
+        return news_urls[:limit]
+    
+    def extract_news_urls(self, category_url, limit=1, category=None):
+        """Extrae las URLs de las primeras noticias de una página de categoría, en orden"""
+        try:
+            return self.fetch_news_urls(category_url, limit, category)
             
+        except Exception as e:
+            print(f"❌ Error extrayendo URL de {category_url}: {e}")
+            return []
+    
+    def extract_feed_urls(self, category_name, log):
+        """Noticias nuevas [(url, timestamp)] según los feeds de la categoría; None para usar el HTML"""
+        feed_urls = self.feed_discovery.feeds.get(category_name) if self.feed_discovery else None
+        if not feed_urls:
             return None
+        
+        latest = {}
+        for feed_url in feed_urls:
+            try:
+                with self.metrics.span('feed_fetch'):
+                    content, items = self.fetch_page(feed_url)
+                
+                # Feed sin cambios (304): reutilizar los ítems ya leídos
+                if items is None:
+                    with self.metrics.span('feed_parse'):
+                        items = self.feed_discovery.parse(content)
+                    self.cache_result(feed_url, items)
+            except Exception as e:
+                log.append(f"   ⚠️ Error leyendo feed {feed_url}: {e}")
+                continue
             
-        except Exception as e:
-            print(f"❌ Error extrayendo URL de {category_url}: {e}")
+            for link, published in items:
+                news_url = self.url_classifier.resolve(link) if self.url_classifier.is_valid(link) else None
+                if news_url is None or not self.url_classifier.matches_category(news_url, category_name):
+                    continue
+                key = normalize_url(news_url)
+                if key not in latest or (published or 0) > (latest[key][1] or 0):
+                    latest[key] = (news_url, published)
+        
+        # Feeds caídos, vacíos o sin enlaces válidos: se vuelve a la página de la categoría
+        if not latest:
+            log.append(f"   ↩️ Feeds sin noticias válidas, usando la página de la categoría")
             return None
+        
+        return self.feed_discovery.select(
+            category_name, list(latest.values()), self.articles_per_category,
+            use_watermark=not self.revisit_synced
+        )
     
-    def is_valid_news_url(self, url):
-        """Valida si una URL es de una noticia válida"""
-        exclude_patterns = [
-            'embed_', 'javascript:', '#', 'mailto:', 'tel:', '/cms/imag/',
-            '.jpg', '.png', '.gif', '.webp', '.pdf', '.doc', '.xlsx',
-            'facebook.com', 'twitter.com', 'instagram.com', 'whatsapp.com',
-            'linkedin.com', '/tax/', '/cms/site/tax/'
-        ]
+    def collect_news_urls(self, content, limit=None):
+        """Recorre los enlaces de una página en orden y retorna las URLs de noticias sin repetir"""
+        news_urls = []
+        seen_keys = set()
         
-        url_lower = url.lower()
-        for pattern in exclude_patterns:
-            if pattern in url_lower:
-                return False
+        for href in self.extract_links(content):
+            if not href or not self.url_classifier.is_valid(href):
+                continue
+            
+            news_url = self.url_classifier.resolve(href)
+            if news_url is None:
+                continue
+            
+            key = normalize_url(news_url)
+            if key in seen_keys:
+                continue
+            seen_keys.add(key)
+            
+            news_urls.append(news_url)
+            if limit and len(news_urls) >= limit and not self.url_classifier.category_rules:
+                break
         
-        # Debe ser una URL interna significativa
-        if url.startswith('/') and len(url) > 15:
-            return True
-        elif 'puranoticia.pnt.cl' in url and len(url) > 50:
+        return news_urls
+    
+    def extract_links(self, content):
+        """Retorna los href de todos los enlaces de una página, en orden"""
+        if self.parser == 'selectolax':
+            return [node.attributes.get('href') for node in SelectolaxParser(content).css('a[href]')]
+        
+        parse_only = SoupStrainer('a', href=True) if self.fast_parse else None
+        soup = BeautifulSoup(content, self.soup_parser, parse_only=parse_only)
+        return [link.get('href') for link in soup.find_all('a', href=True)]
+    
+    def parse_article(self, content):
+        """Parsea una página de artículo (solo las regiones necesarias si fast_parse está activo)"""
+        parse_only = ArticleStrainer() if self.fast_parse else None
+        return BeautifulSoup(content, self.soup_parser, parse_only=parse_only)
+    
+    def page_url(self, category_url, page):
+        """URL de la página N de un listado de categoría (/p/1 o embed_X___1.html)"""
+        if re.search(r'/p/\d+/?$', category_url):
+            return re.sub(r'/p/\d+(/?)$', f'/p/{page}\\1', category_url)
+        if re.search(r'___\d+\.html$', category_url):
+            return re.sub(r'___\d+\.html$', f'___{page}.html', category_url)
+        return category_url if page == 1 else None
+    
+    def extract_first_news_url(self, category_url):
+        """Extrae la URL de la primera noticia de una página de categoría"""
+        news_urls = self.extract_news_urls(category_url, limit=1)
+        return news_urls[0] if news_urls else None
+    
+    def is_valid_news_url(self, url, category=None):
+        """Valida si una URL es de una noticia válida"""
+        if not self.url_classifier.is_valid(url):
+            return False
+        if category is None:
             return True
         
-        return False
+        resolved = self.url_classifier.resolve(url)
+        return resolved is not None and self.url_classifier.matches_category(resolved, category)
     
     def extract_article_content(self, url):
         """Extrae el contenido completo de un artículo"""
         try:
-            response = self.session.get(url)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Extraer título
-            title = self.extract_title(soup)
+            with self.metrics.span('article_fetch'):
+                content, cached_article = self.fetch_page(url)
             
-            # Extraer subtítulo
-            subtitle = self.extract_subtitle(soup)
+            # Artículo sin cambios (304): no es necesario volver a procesarlo
+            if cached_article is not None:
+                return cached_article
             
-            # Extraer imagen principal
-            main_image = self.extract_main_image(soup)
-            
-            # Extraer fecha y hora
-            date_time = self.extract_date_time(soup)
-            
-            # Extraer contenido
-            content = self.extract_content(soup)
+            with self.metrics.span('article_parse'):
+                soup = self.parse_article(content)
+                
+                # Extraer título
+                title = self.extract_title(soup)
+                
+                # Extraer subtítulo
+                subtitle = self.extract_subtitle(soup)
+                
+                # Extraer imagen principal
+                main_image = self.extract_main_image(soup)
+                
+                # Extraer fecha y hora
+                date_time = self.extract_date_time(soup)
+                
+                # Extraer contenido
+                content = self.extract_content(soup)
             
-            return {
+            article_data = {
                 'title': title,
                 'subtitle': subtitle,
                 'main_image': main_image,
@@ -108,6 +1639,9 @@ class PuraNoticiaExtractor:
                 'url': url
             }
             
+            self.cache_result(url, article_data)
+            return article_data
+            
         except Exception as e:
             print(f"❌ Error extrayendo contenido de {url}: {e}")
             return None
@@ -225,68 +1759,243 @@ class PuraNoticiaExtractor:
         try:
             cuerpo_div = soup.find('div', class_='CUERPO')
             if cuerpo_div:
-                # Limpiar elementos no deseados
-                for selector in [
-                    'div.ad-pnt-slot',
-                    'div.subtitulos',
-                    'div.anclas',
-                    'div.banner-plain'
-                ]:
-                    for element in cuerpo_div.select(selector):
-                        element.decompose()
-                
-                # Eliminar blockquotes con "LEER TAMBIÉN"
-                for blockquote in cuerpo_div.find_all('blockquote'):
-                    text = blockquote.get_text().strip().upper()
-                    if 'LEER TAMBIÉN' in text or 'LEER TAMBIEN' in text:
-                        blockquote.decompose()
-                
-                # Convertir rutas relativas de imágenes a absolutas
-                for img in cuerpo_div.find_all('img'):
-                    src = img.get('src')
-                    if src and src.startswith('/'):
-                        img['src'] = self.base_url + src
-                
-                return str(cuerpo_div)
+                return self.content_transformer.transform(cuerpo_div)
                 
         except Exception:
             pass
         return ""
     
-    def extract_latest_news(self):
-        """Extrae la primera noticia de cada categoría"""
-        print("🔍 Iniciando extracción de noticias de Pura Noticia...")
+    def iter_category_news(self, category_name, category_url, log):
+        """Genera las noticias nuevas de una categoría a medida que se extraen"""
+        log.append(f"📰 Procesando categoría: {category_name}")
         
-        extracted_news = []
+        # Extraer URLs de las primeras noticias: desde los feeds si hay, si no desde el HTML
+        feed_items = self.extract_feed_urls(category_name, log)
+        if feed_items is not None:
+            published = dict(feed_items)
+            news_urls = list(published)
+            self.metrics.count('category_discovery', source='feed')
+            log.append(f"   📡 {len(news_urls)} noticia(s) nueva(s) según los feeds")
+            if not news_urls:
+                return
+        else:
+            published = None
+            news_urls = self.extract_news_urls(category_url, self.articles_per_category, category_name)
+            self.metrics.count('category_discovery', source='html')
+        
+        if not news_urls:
+            log.append(f"   ✗ No se encontró URL válida")
+            return
+        
+        # La marca de agua de los feeds avanza recién cuando cada noticia se sincroniza
+        if published is not None:
+            self.feed_discovery.track(category_name, feed_items)
+        
+        # Descartar las ya sincronizadas antes de descargarlas
+        if self.seen_index and not self.revisit_synced:
+            unseen_urls = self.seen_index.filter_unseen(news_urls)
+            skipped = len(news_urls) - len(unseen_urls)
+            if skipped:
+                log.append(f"   ↷ {skipped} noticia(s) ya sincronizada(s)")
+                if published is not None:
+                    for url in set(news_urls) - set(unseen_urls):
+                        self.feed_discovery.confirm(url)
+            news_urls = unseen_urls
+        
+        # Las que esperan un reintento en el outbox se publican desde ahí, con su backoff
+        queued_urls = self.filter_queued(news_urls)
+        if len(queued_urls) < len(news_urls):
+            log.append(f"   ↷ {len(news_urls) - len(queued_urls)} noticia(s) pendiente(s) en el outbox")
+            news_urls = queued_urls
         
-        for category_name, category_url in self.categories.items():
-            print(f"📰 Procesando categoría: {category_name}")
+        for news_url in news_urls:
+            log.append(f"   ✓ URL encontrada: {news_url[:60]}...")
             
-            # Extraer URL de la primera noticia
-            first_news_url = self.extract_first_news_url(category_url)
+            # Extraer contenido completo
+            article_data = self.extract_article_content(news_url)
             
-            if first_news_url:
-                print(f"   ✓ URL encontrada: {first_news_url[:60]}...")
-                
-                # Extraer contenido completo
-                article_data = self.extract_article_content(first_news_url)
-                
-                if article_data and article_data['title']:
-                    article_data['category'] = category_name
-                    extracted_news.append(article_data)
-                    print(f"   ✓ Extraído: {article_data['title'][:50]}...")
-                else:
-                    print(f"   ✗ Error extrayendo contenido")
+            if article_data and article_data['title']:
+                article_data['category'] = category_name
+                log.append(f"   ✓ Extraído: {article_data['title'][:50]}...")
+                yield article_data
             else:
-                print(f"   ✗ No se encontró URL válida")
+                log.append(f"   ✗ Error extrayendo contenido")
+    
+    def filter_queued(self, urls):
+        """Retorna las URLs que no esperan un reintento en ningún outbox, conservando el orden"""
+        if not self.outboxes:
+            return urls
+        return [url for url in urls if not any(outbox.contains(url) for outbox in self.outboxes)]
+    
+    def process_category(self, category_name, category_url):
+        """Extrae las noticias nuevas de una categoría y retorna (noticias, líneas de log)"""
+        log = []
+        articles = list(self.iter_category_news(category_name, category_url, log))
+        return articles, log
+    
+    def mark_synced(self, url):
+        """Registra una URL de origen como sincronizada"""
+        if self.seen_index:
+            self.seen_index.add(url)
+        if self.feed_discovery:
+            self.feed_discovery.confirm(url)
+    
+    def extract_latest_news(self):
+        """Extrae las noticias más recientes de cada categoría"""
+        print("🔍 Iniciando extracción de noticias de Pura Noticia...")
+        
+        extracted_news = []
+        categories = list(self.categories.items())
+        
+        # Las categorías se procesan en paralelo pero los resultados
+        # (y sus logs) se entregan en el orden original
+        workers = min(self.max_workers, len(categories)) or 1
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(lambda item: self.process_category(*item), categories)
             
-            time.sleep(0.5)  # Pausa entre requests
+            for articles, log in results:
+                print("\n".join(log))
+                extracted_news.extend(articles)
         
         print(f"✅ Extracción completada: {len(extracted_news)} noticias extraídas")
         return extracted_news
 
+# Códigos HTTP que justifican reintentar un request
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+# Respuestas de /batch/v1 que indican que el lote se rechazó sin ejecutar ningún post
+BATCH_REJECTED_STATUSES = {400, 404, 405, 413, 501}
+
+
+class BatchRejectedError(RuntimeError):
+    """El servidor rechazó el lote completo antes de procesarlo"""
+
+# Transferencia de imágenes: tamaño de bloque y máximo en memoria antes de pasar a disco
+IMAGE_CHUNK_SIZE = 64 * 1024
+IMAGE_SPOOL_SIZE = 1024 * 1024
+
+
+# Formatos que se optimizan (GIF y SVG se suben tal cual)
+OPTIMIZABLE_IMAGE_TYPES = {'image/jpeg', 'image/jpg', 'image/png', 'image/webp'}
+
+
+def optimize_image_bytes(data, max_width, quality, image_format):
+    """Reduce, quita metadatos y recodifica una imagen; retorna (bytes, tipo, segundos de CPU) o None
+
+    Se ejecuta en un proceso aparte, por eso recibe y retorna solo valores simples.
+    """
+    started = time.process_time()
+    image_format = image_format.upper()
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            if getattr(image, 'is_animated', False):
+                return None
+            
+            image.load()
+            if image.width > max_width:
+                height = max(1, round(image.height * max_width / image.width))
+                image = image.resize((max_width, height), Image.LANCZOS)
+            
+            if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+                image = image.convert('RGB')
+            elif image_format == 'WEBP' and image.mode not in ('RGB', 'RGBA', 'L'):
+                image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+            
+            # Sin pasar exif ni icc_profile al guardar, los metadatos no se copian
+            output = io.BytesIO()
+            if image_format == 'JPEG':
+                image.save(output, 'JPEG', quality=quality, optimize=True, progressive=True)
+            else:
+                image.save(output, 'WEBP', quality=quality, method=4)
+    except Exception:
+        return None
+    
+    return output.getvalue(), f"image/{image_format.lower()}", time.process_time() - started
+
+
+class ImageOptimizer:
+    """Optimiza imágenes en un pool de procesos para no bloquear las descargas y subidas"""
+    def __init__(self, max_width=1600, quality=82, image_format='webp', workers=2):
+        self.max_width = max(1, max_width)
+        self.quality = min(100, max(1, quality))
+        self.image_format = 'jpeg' if image_format.lower() in ('jpeg', 'jpg') else 'webp'
+        self.workers = max(1, workers)
+        self.executor = None
+        self.lock = threading.Lock()
+        self.stats = {'images': 0, 'skipped': 0, 'bytes_in': 0, 'bytes_out': 0, 'seconds': 0.0}
+    
+    def get_executor(self):
+        """Crea el pool de procesos en el primer uso"""
+        with self.lock:
+            if self.executor is None:
+                # Se crea desde hilos de trabajo: 'spawn' evita hacer fork de un proceso con hilos
+                self.executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context('spawn')
+                )
+            return self.executor
+    
+    def optimize(self, data, content_type):
+        """Retorna (bytes, tipo, segundos) optimizados, o None si conviene subir el original"""
+        if content_type.split(';')[0].strip().lower() not in OPTIMIZABLE_IMAGE_TYPES:
+            return None
+        
+        result = self.get_executor().submit(
+            optimize_image_bytes, data, self.max_width, self.quality, self.image_format
+        ).result()
+        
+        with self.lock:
+            if result is None or len(result[0]) >= len(data):
+                self.stats['skipped'] += 1
+                return None
+            self.stats['images'] += 1
+            self.stats['bytes_in'] += len(data)
+            self.stats['bytes_out'] += len(result[0])
+            self.stats['seconds'] += result[2]
+        return result
+    
+    def summary(self):
+        """Resumen de bytes ahorrados y tiempo de proceso"""
+        with self.lock:
+            stats = dict(self.stats)
+        saved = stats['bytes_in'] - stats['bytes_out']
+        per_image = stats['seconds'] / stats['images'] * 1000 if stats['images'] else 0.0
+        ratio = saved / stats['bytes_in'] if stats['bytes_in'] else 0.0
+        return (f"Imágenes optimizadas: {stats['images']} ({stats['skipped']} sin cambios), "
+                f"{saved / 1024:.0f} KB ahorrados ({ratio:.0%}), {per_image:.0f} ms por imagen")
+    
+    def close(self):
+        """Cierra el pool de procesos (se vuelve a crear si se necesita)"""
+        with self.lock:
+            executor, self.executor = self.executor, None
+        if executor:
+            executor.shutdown()
+
+
+class StreamedFileBody:
+    """Cuerpo de request que se envía por bloques desde un archivo, con largo conocido"""
+    def __init__(self, fileobj, size):
+        self.fileobj = fileobj
+        self.size = size
+    
+    def __len__(self):
+        return self.size
+    
+    def __iter__(self):
+        # Se rebobina en cada iteración para que los reintentos envíen el archivo completo
+        self.fileobj.seek(0)
+        while True:
+            chunk = self.fileobj.read(IMAGE_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+
 class WordPressAPI:
-    def __init__(self, site_url, username, app_password):
+    def __init__(self, site_url, username, app_password, post_index=None, category_ttl=24 * 3600,
+                 pool_size=10, connect_timeout=5, read_timeout=30, max_retries=3, backoff=1.0,
+                 media_index=None, metrics=None, near_dup_index=None, revision_index=None,
+                 update_posts=False, outbox=None, image_optimizer=None, requests_per_second=0,
+                 category_aliases=None):
         self.site_url = site_url.rstrip('/')
         self.username = username
         self.app_password = app_password
@@ -295,19 +2004,162 @@ class WordPressAPI:
         credentials = f"{username}:{app_password}"
         self.token = base64.b64encode(credentials.encode()).decode()
         
-        self.headers = {
-            'Authorization': f'Basic {self.token}',
-            'Content-Type': 'application/json'
-        }
+        # Sesión con pool de conexiones keep-alive; los reintentos se manejan en request()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        
+        # Límite de requests propio del sitio (0 = sin límite)
+        self.rate_limiter = TokenBucket(requests_per_second)
+        
+        # Métricas de tiempos y transferencia (las llamadas HTTP llevan la etiqueta del sitio)
+        self.metrics = metrics or Metrics()
         
-        # Cache para IDs de categorías
+        # Cache para IDs de categorías y taxonomía completa (cacheada en disco), y nombres
+        # de categoría propios del sitio: {'Nacional': 'Chile'}
+        self.category_aliases = category_aliases or {}
         self.category_cache = {}
+        self.categories_refreshed = False
+        self.category_map = None
+        self.category_ttl = category_ttl
+        self.category_lock = threading.Lock()
+        
+        # Soporte de /batch/v1 (se consulta una vez)
+        self.batch_checked = False
+        self.batch_max_items = None
+        
+        # Índices locales de duplicados, casi duplicados e imágenes subidas (opcionales)
+        self.post_index = post_index
+        self.near_dup_index = near_dup_index
+        self.media_index = media_index
+        
+        # Subidas en curso por URL y por hash: la misma imagen en varios hilos se sube una vez
+        self.upload_locks = {}
+        self.upload_locks_lock = threading.Lock()
+        
+        # Hashes de lo publicado por URL de origen y modo de actualización de posts existentes
+        self.revision_index = revision_index
+        self.update_posts = update_posts
+        
+        # Cola durable de publicaciones pendientes y optimización de imágenes (opcionales)
+        self.outbox = outbox
+        self.image_optimizer = image_optimizer
+    
+    def endpoint_name(self, method, url):
+        """Nombre agrupado de un endpoint para las métricas (sin IDs ni query)"""
+        parsed = urlparse(url)
+        if parsed.netloc != urlparse(self.site_url).netloc:
+            return f"{method} {parsed.netloc}"
+        path = re.sub(r'/\d+', '/<id>', parsed.path.split('/wp-json', 1)[-1])
+        return f"{method} {path}"
+    
+    def get_latency_stats(self):
+        """Estadísticas de latencia por endpoint (cantidad, promedio, p50, p95, p99 y máximo en segundos)"""
+        latency = {}
+        for labels, summary in self.metrics.timing_stats('http_request').items():
+            labels = dict(labels)
+            if labels.get('site') == self.site_url:
+                latency[labels['endpoint']] = summary
+        return latency
+    
+    def retry_delay(self, response, attempt):
+        """Calcula la espera antes de reintentar, respetando Retry-After"""
+        delay = self.backoff * (2 ** attempt)
+        
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after:
+            try:
+                delay = max(delay, float(retry_after))
+            except ValueError:
+                try:
+                    retry_at = parsedate_to_datetime(retry_after)
+                    delay = max(delay, (retry_at - datetime.now(timezone.utc)).total_seconds())
+                except (TypeError, ValueError):
+                    pass
+        
+        return min(delay, 60)
+    
+    def request(self, method, url, **kwargs):
+        """Ejecuta un request con timeouts, reintentos con backoff exponencial y métricas"""
+        kwargs.setdefault('timeout', self.timeout)
+        endpoint = self.endpoint_name(method, url)
+        
+        # Solo GET es idempotente; los POST se reintentan cuando el servidor no los procesó
+        if method == 'GET':
+            retry_statuses = RETRYABLE_STATUSES
+            retry_errors = (requests.ConnectionError, requests.Timeout)
+        else:
+            retry_statuses = {429, 503}
+            retry_errors = (requests.ConnectTimeout,)
+        
+        attempt = 0
+        while True:
+            with self.metrics.span('rate_limit_wait', endpoint=endpoint):
+                self.rate_limiter.acquire()
+            
+            started = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except requests.RequestException as e:
+                self.metrics.record_http(endpoint, time.perf_counter() - started, 'error', site=self.site_url)
+                if not isinstance(e, retry_errors) or attempt >= self.max_retries:
+                    raise
+                self.metrics.count('http_retries', endpoint=endpoint)
+                time.sleep(self.retry_delay(None, attempt))
+                attempt += 1
+                continue
+            
+            self.metrics.record_http(endpoint, time.perf_counter() - started, response.status_code,
+                                     self.response_size(response, kwargs.get('stream')),
+                                     self.body_size(response.request.body), site=self.site_url)
+            
+            if response.status_code in retry_statuses and attempt < self.max_retries:
+                print(f"   ↻ {endpoint} respondió {response.status_code}, reintentando...")
+                self.metrics.count('http_retries', endpoint=endpoint)
+                # Sin leer el cuerpo (p. ej. con stream=True) la conexión no vuelve al pool
+                response.close()
+                time.sleep(self.retry_delay(response, attempt))
+                attempt += 1
+                continue
+            
+            return response
+    
+    @staticmethod
+    def response_size(response, stream=False):
+        """Bytes recibidos; en descargas por streaming se toma Content-Length"""
+        if stream:
+            return int(response.headers.get('Content-Length') or 0)
+        return len(response.content)
+    
+    @staticmethod
+    def body_size(body):
+        """Bytes enviados en el cuerpo de un request (0 si no tiene largo conocido)"""
+        try:
+            return len(body) if body is not None else 0
+        except TypeError:
+            return 0
+    
+    def api_request(self, method, url, **kwargs):
+        """Ejecuta un request autenticado contra la API de WordPress"""
+        headers = {'Authorization': f'Basic {self.token}'}
+        headers.update(kwargs.pop('headers', None) or {})
+        return self.request(method, url, headers=headers, **kwargs)
+    
+    def state_path(self, filename):
+        """Ruta de un archivo de estado local propio de este sitio (host más ruta de la instalación)"""
+        parsed_url = urlparse(self.site_url)
+        site_key = parsed_url.netloc + parsed_url.path.replace('/', '_')
+        return os.path.join(STATE_DIR, site_key, filename)
     
     def test_connection(self):
         """Prueba la conexión con WordPress"""
         try:
             api_url = f"{self.site_url}/wp-json/wp/v2/users/me"
-            response = requests.get(api_url, headers=self.headers)
+            response = self.api_request('GET', api_url)
             
             if response.status_code == 200:
                 user_data = response.json()
@@ -322,22 +2174,110 @@ class WordPressAPI:
             print(f"❌ Error de conexión: {e}")
             return False
     
+    def fetch_all_categories(self):
+        """Descarga la taxonomía completa de categorías con paginación"""
+        api_url = f"{self.site_url}/wp-json/wp/v2/categories"
+        params = {'per_page': 100, '_fields': 'id,name,slug', 'page': 1}
+        categories = []
+        
+        while True:
+            response = self.api_request('GET', api_url, params=params)
+            
+            # WordPress responde 400 al pedir una página fuera de rango
+            if response.status_code == 400 and params['page'] > 1:
+                break
+            response.raise_for_status()
+            
+            page = response.json()
+            categories.extend({'id': c['id'], 'name': c['name'], 'slug': c['slug']} for c in page)
+            
+            total_pages = int(response.headers.get('X-WP-TotalPages', params['page']))
+            if len(page) < params['per_page'] or params['page'] >= total_pages:
+                break
+            params['page'] += 1
+        
+        return categories
+    
+    def load_categories(self, force=False):
+        """Carga el mapa de categorías desde la cache en disco o desde WordPress"""
+        cache_path = self.state_path('categories.json')
+        categories = None
+        fetched = False
+        
+        if not force and os.path.exists(cache_path):
+            try:
+                with open(cache_path, encoding='utf-8') as f:
+                    cached = json.load(f)
+                if time.time() - cached['fetched_at'] < self.category_ttl:
+                    categories = cached['categories']
+            except (OSError, ValueError, KeyError):
+                categories = None
+        
+        if categories is None:
+            categories = self.fetch_all_categories()
+            fetched = True
+            self.categories_refreshed = True
+            
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            with open(cache_path, 'w', encoding='utf-8') as f:
+                json.dump({'fetched_at': time.time(), 'categories': categories}, f, ensure_ascii=False)
+        
+        # Búsqueda insensible a mayúsculas y acentos, por nombre o slug
+        category_map = {}
+        for category in categories:
+            category_map.setdefault(normalize_text(category['slug']), category['id'])
+        for category in categories:
+            category_map[normalize_text(category['name'])] = category['id']
+        
+        self.category_map = category_map
+        return fetched
+    
+    def search_category_id(self, category_name):
+        """Busca el ID de una categoría con el parámetro search de la API"""
+        api_url = f"{self.site_url}/wp-json/wp/v2/categories"
+        params = {'search': category_name, 'per_page': 10}
+        response = self.api_request('GET', api_url, params=params)
+        
+        if response.status_code == 200:
+            for category in response.json():
+                if normalize_text(category['name']) == normalize_text(category_name):
+                    return category['id']
+        return None
+    
     def get_category_id(self, category_name):
         """Obtiene el ID de una categoría por nombre"""
+        category_name = self.category_aliases.get(category_name) or category_name
         if category_name in self.category_cache:
             return self.category_cache[category_name]
         
         try:
-            api_url = f"{self.site_url}/wp-json/wp/v2/categories"
-            params = {'search': category_name, 'per_page': 10}
-            response = requests.get(api_url, headers=self.headers, params=params)
-            
-            if response.status_code == 200:
-                categories = response.json()
-                for category in categories:
-                    if category['name'].lower() == category_name.lower():
-                        self.category_cache[category_name] = category['id']
-                        return category['id']
+            with self.category_lock:
+                if category_name in self.category_cache:
+                    return self.category_cache[category_name]
+                key = normalize_text(category_name)
+                
+                try:
+                    if self.category_map is None:
+                        self.load_categories()
+                    
+                    category_id = self.category_map.get(key)
+                    
+                    # La categoría puede ser más nueva que la cache en disco (una descarga por ejecución)
+                    if category_id is None and not self.categories_refreshed:
+                        self.load_categories(force=True)
+                        category_id = self.category_map.get(key)
+                    
+                    # Con la taxonomía al día, un nombre que no está se recuerda como inexistente
+                    self.category_cache[category_name] = category_id
+                        
+                except Exception as e:
+                    print(f"⚠️ No se pudo cargar la taxonomía de categorías: {e}")
+                    category_id = self.search_category_id(category_name)
+                    if category_id:
+                        self.category_cache[category_name] = category_id
+                
+                if category_id:
+                    return category_id
             
             print(f"⚠️ Categoría '{category_name}' no encontrada")
             return None
@@ -346,6 +2286,13 @@ class WordPressAPI:
             print(f"❌ Error obteniendo categoría '{category_name}': {e}")
             return None
     
+    def forget_missing_categories(self):
+        """Permite volver a buscar las categorías no encontradas (p. ej. en cada refresco del modo continuo)"""
+        with self.category_lock:
+            self.category_cache = {name: category_id for name, category_id in self.category_cache.items()
+                                   if category_id}
+            self.categories_refreshed = False
+    
     def get_recent_posts_by_category(self, category_name, limit=5):
         """Obtiene los posts recientes de una categoría"""
         try:
@@ -361,126 +2308,1384 @@ class WordPressAPI:
                 'order': 'desc'
             }
             
-            response = requests.get(api_url, headers=self.headers, params=params)
+            response = self.api_request('GET', api_url, params=params)
+            
+            if response.status_code == 200:
+                posts = response.json()
+                return [{'title': post['title']['rendered'], 'id': post['id']} for post in posts]
+            else:
+                print(f"❌ Error obteniendo posts de '{category_name}': {response.status_code}")
+                return []
+                
+        except Exception as e:
+            print(f"❌ Error obteniendo posts de '{category_name}': {e}")
+            return []
+    
+    def load_post_index(self, window_days=7):
+        """Carga en bloque los posts recientes en el índice local de duplicados"""
+        if self.post_index is None:
+            self.post_index = PostIndex()
+        
+        # En un índice persistente solo se piden los posts nuevos desde la última carga
+        started_at = datetime.now(timezone.utc)
+        last_sync = self.post_index.get_meta('last_sync')
+        if last_sync:
+            since = datetime.fromisoformat(last_sync) - timedelta(hours=1)
+        else:
+            since = started_at - timedelta(days=window_days)
+        
+        api_url = f"{self.site_url}/wp-json/wp/v2/posts"
+        params = {
+            '_fields': 'id,title,meta',
+            'after': since.isoformat(timespec='seconds'),
+            'per_page': 100,
+            'orderby': 'date',
+            'order': 'desc',
+            'page': 1
+        }
+        
+        loaded = 0
+        try:
+            while True:
+                response = self.api_request('GET', api_url, params=params)
+                
+                # WordPress responde 400 al pedir una página fuera de rango
+                if response.status_code == 400 and params['page'] > 1:
+                    break
+                if response.status_code != 200:
+                    print(f"❌ Error cargando índice de posts: {response.status_code}")
+                    return False
+                
+                posts = response.json()
+                for post in posts:
+                    meta = post.get('meta') or {}
+                    source_url = meta.get('pura_noticia_url') if isinstance(meta, dict) else None
+                    self.post_index.add(post['id'], post['title']['rendered'], source_url)
+                loaded += len(posts)
+                
+                total_pages = int(response.headers.get('X-WP-TotalPages', params['page']))
+                if len(posts) < params['per_page'] or params['page'] >= total_pages:
+                    break
+                params['page'] += 1
+            
+            self.post_index.set_meta('last_sync', started_at.isoformat())
+            print(f"📚 Índice de duplicados: {loaded} posts cargados, {len(self.post_index)} en total")
+            return True
+            
+        except Exception as e:
+            print(f"❌ Error cargando índice de posts: {e}")
+            return False
+    
+    def post_exists(self, title, category_name, source_url=None, content=None):
+        """Verifica si un post ya existe por título (o URL de origen si hay índice local) o es casi idéntico a otro"""
+        if self.post_index is not None:
+            with self.metrics.span('dedup_check', source='index'):
+                if self.post_index.contains(title, source_url):
+                    return True
+        else:
+            with self.metrics.span('dedup_check', source='api'):
+                recent_posts = self.get_recent_posts_by_category(category_name, 5)
+            
+            for post in recent_posts:
+                if post['title'].strip() == title.strip():
+                    return True
+        
+        # Misma noticia con el título editado o publicada en otra categoría
+        if self.near_dup_index is not None and content:
+            with self.metrics.span('dedup_check', source='near_dup'):
+                match = self.near_dup_index.find_or_reserve(source_url, title, content)
+            if match:
+                self.metrics.count('near_duplicates')
+                print(f"   🪞 Casi duplicado ({match['similarity']:.0%}) de "
+                      f"{match['source_url'] or match['post_id']}")
+                return True
+        
+        return False
+    
+    def is_duplicate(self, article_data):
+        """Verifica una noticia antes de publicarla; las nuevas quedan en el outbox hasta publicarse"""
+        exists = self.post_exists(article_data['title'], article_data['category'],
+                                  article_data['url'], article_data['content'])
+        if self.outbox is not None:
+            if exists:
+                self.outbox.complete(article_data['url'])
+            else:
+                self.outbox.enqueue(article_data)
+        return exists
+    
+    def record_failure(self, article_data, error):
+        """Libera la reserva de casi duplicado y programa el reintento de una publicación fallida"""
+        if self.near_dup_index is not None:
+            self.near_dup_index.release(article_data['url'])
+        if self.outbox is not None:
+            self.outbox.fail(article_data['url'], error)
+    
+    def download_image(self, image_url):
+        """Descarga una imagen por bloques a un archivo temporal; retorna (archivo, tamaño, tipo, sha256)"""
+        response = self.request('GET', image_url, stream=True)
+        try:
+            response.raise_for_status()
+            content_type = response.headers.get('content-type', 'image/jpeg')
+            
+            # Las imágenes pequeñas quedan en memoria y las grandes pasan a disco
+            spool = tempfile.SpooledTemporaryFile(max_size=IMAGE_SPOOL_SIZE)
+            digest = hashlib.sha256()
+            for chunk in response.iter_content(chunk_size=IMAGE_CHUNK_SIZE):
+                digest.update(chunk)
+                spool.write(chunk)
+            
+            return spool, spool.tell(), content_type, digest.hexdigest()
+        finally:
+            response.close()
+    
+    def optimize_image(self, spool, size, content_type):
+        """Optimiza una imagen descargada; retorna (archivo, tamaño, tipo) o None para subir el original"""
+        spool.seek(0)
+        try:
+            with self.metrics.span('image_optimize'):
+                result = self.image_optimizer.optimize(spool.read(), content_type)
+        except Exception as e:
+            print(f"   ⚠️ No se pudo optimizar la imagen: {e}")
+            return None
+        if result is None:
+            return None
+        
+        data, optimized_type, _ = result
+        self.metrics.count('image_bytes_saved', size - len(data))
+        print(f"   🗜️ Imagen optimizada: {size / 1024:.0f} KB → {len(data) / 1024:.0f} KB ({optimized_type})")
+        
+        optimized = tempfile.SpooledTemporaryFile(max_size=IMAGE_SPOOL_SIZE)
+        optimized.write(data)
+        return optimized, len(data), optimized_type
+    
+    @contextmanager
+    def upload_lock(self, kind, key):
+        """Serializa las subidas de una misma imagen; quien espera encuentra el ID en el índice"""
+        with self.upload_locks_lock:
+            entry = self.upload_locks.setdefault((kind, key), [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self.upload_locks_lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self.upload_locks[(kind, key)]
+    
+    def upload_image(self, image_url, filename):
+        """Sube una imagen a WordPress y retorna el ID del attachment"""
+        try:
+            with self.upload_lock('url', image_url):
+                return self.upload_new_image(image_url, filename)
+        except Exception as e:
+            print(f"   ❌ Error procesando imagen: {e}")
+            return None
+    
+    def upload_new_image(self, image_url, filename):
+        """Descarga y sube una imagen que no esté ya en WordPress (se llama con el lock de su URL)"""
+        # Imagen ya subida desde la misma URL: no se descarga ni se sube
+        if self.media_index:
+            media_id = self.media_index.get_by_url(image_url)
+            if media_id:
+                self.metrics.count('media_reused', source='url')
+                print(f"   ♻️ Imagen ya existente en WordPress (ID: {media_id})")
+                return media_id
+        
+        # Descargar la imagen
+        print(f"   📥 Descargando imagen: {image_url[:50]}...")
+        with self.metrics.span('image_download'):
+            spool, size, content_type, sha256 = self.download_image(image_url)
+        self.metrics.count('image_bytes', size)
+        
+        with ExitStack() as stack:
+            stack.enter_context(spool)
+            stack.enter_context(self.upload_lock('sha256', sha256))
+            
+            # Mismo contenido ya subido desde otra URL: se reutiliza el attachment
+            if self.media_index:
+                media_id = self.media_index.get_by_hash(sha256)
+                if media_id:
+                    self.media_index.add(image_url, sha256, media_id)
+                    self.metrics.count('media_reused', source='hash')
+                    print(f"   ♻️ Imagen ya existente en WordPress (ID: {media_id})")
+                    return media_id
+            
+            # Reducir y recodificar antes de subir (el hash sigue siendo el del original)
+            if self.image_optimizer:
+                optimized = self.optimize_image(spool, size, content_type)
+                if optimized:
+                    spool.close()
+                    spool, size, content_type = optimized
+                    stack.enter_context(spool)
+                    filename = os.path.splitext(filename)[0] + '.' + content_type.split('/')[1]
+            
+            # Subir el archivo como cuerpo binario, leyéndolo por bloques
+            safe_filename = re.sub(r'[^A-Za-z0-9._-]', '_', filename)
+            upload_headers = {
+                'Content-Type': content_type,
+                'Content-Disposition': f'attachment; filename="{safe_filename}"'
+            }
+            
+            api_url = f"{self.site_url}/wp-json/wp/v2/media"
+            with self.metrics.span('media_upload'):
+                upload_response = self.api_request(
+                    'POST', api_url, headers=upload_headers, data=StreamedFileBody(spool, size)
+                )
+            
+            # Se registra antes de soltar el lock del hash, así quien espera reutiliza el ID
+            if upload_response.status_code == 201:
+                media_data = upload_response.json()
+                if self.media_index:
+                    self.media_index.add(image_url, sha256, media_data['id'])
+                print(f"   ✅ Imagen subida exitosamente (ID: {media_data['id']})")
+                return media_data['id']
+            else:
+                print(f"   ❌ Error subiendo imagen: {upload_response.status_code}")
+                return None
+    
+    def prepare_post(self, article_data):
+        """Resuelve la categoría, sube la imagen destacada y arma los datos del post"""
+        category_id = self.get_category_id(article_data['category'])
+        if not category_id:
+            print(f"❌ No se pudo obtener ID de categoría '{article_data['category']}'")
+            self.record_failure(article_data, 'categoría no encontrada')
+            return None
+        
+        # Subir imagen destacada si existe (en un reintento del outbox ya puede estar subida)
+        featured_image_id = article_data.get('media_id')
+        if featured_image_id:
+            print(f"   ♻️ Imagen ya subida en un intento anterior (ID: {featured_image_id})")
+        elif article_data['main_image']:
+            print(f"   🖼️ Procesando imagen destacada...")
+            
+            # Generar nombre de archivo único
+            parsed_url = urlparse(article_data['main_image'])
+            filename = os.path.basename(parsed_url.path)
+            if not filename or '.' not in filename:
+                filename = f"imagen_{int(time.time())}.jpg"
+            
+            featured_image_id = self.upload_image(article_data['main_image'], filename)
+            if featured_image_id and self.outbox is not None:
+                self.outbox.set_media(article_data['url'], featured_image_id)
+        
+        # Preparar datos del post
+        post_data = {
+            'title': article_data['title'],
+            'content': article_data['content'],
+            'excerpt': article_data['subtitle'],
+            'status': 'publish',
+            'categories': [category_id],
+            'meta': {
+                'pura_noticia_url': article_data['url']
+            }
+        }
+        
+        # Agregar imagen destacada si se subió exitosamente
+        if featured_image_id:
+            post_data['featured_media'] = featured_image_id
+            print(f"   🎯 Imagen destacada asignada (ID: {featured_image_id})")
+        
+        return post_data
+    
+    def handle_post_response(self, status_code, post, article_data, post_data, error_text=''):
+        """Registra el resultado de la creación de un post; retorna True si se creó"""
+        if status_code == 201:
+            if self.post_index is not None:
+                self.post_index.add(post['id'], article_data['title'], article_data['url'])
+            if self.near_dup_index is not None:
+                self.near_dup_index.add(post['id'], article_data['url'],
+                                        article_data['title'], article_data['content'])
+            if self.revision_index is not None:
+                self.revision_index.record(article_data['url'], post['id'],
+                                           PostRevisionIndex.field_hashes(article_data))
+            if self.outbox is not None:
+                self.outbox.complete(article_data['url'])
+            print(f"✅ Post creado: {post['title']['rendered']}")
+            print(f"   URL: {post['link']}")
+            if post_data.get('featured_media'):
+                print(f"   🖼️ Con imagen destacada")
+            return True
+        
+        self.record_failure(article_data, f"HTTP {status_code}: {error_text[:200]}")
+        print(f"❌ Error creando post: {status_code}")
+        print(f"   Respuesta: {error_text[:200]}")
+        return False
+    
+    def create_post(self, article_data):
+        """Crea un nuevo post en WordPress con imagen destacada"""
+        try:
+            post_data = self.prepare_post(article_data)
+            if post_data is None:
+                return False
             
+            return self.send_post(article_data, post_data)
+                
+        except Exception as e:
+            self.record_failure(article_data, e)
+            print(f"❌ Error creando post: {e}")
+            return False
+    
+    def send_post(self, article_data, post_data):
+        """Crea el post con un request individual"""
+        api_url = f"{self.site_url}/wp-json/wp/v2/posts"
+        with self.metrics.span('post_create'):
+            response = self.api_request('POST', api_url, json=post_data)
+        
+        post = response.json() if response.status_code == 201 else None
+        return self.handle_post_response(
+            response.status_code, post, article_data, post_data, response.text
+        )
+    
+    def update_post(self, article_data):
+        """Envía al post ya publicado solo los campos que cambiaron en el origen; retorna 'updated', 'unchanged', 'untracked' o 'error'"""
+        if self.revision_index is None:
+            return 'untracked'
+        
+        source_url = article_data['url']
+        hashes = PostRevisionIndex.field_hashes(article_data)
+        stored = self.revision_index.get(source_url)
+        
+        if stored is None:
+            # Post publicado antes de guardar hashes: lo actual queda como línea base
+            post_id = self.post_index.get_post_id(source_url) if self.post_index is not None else None
+            if post_id:
+                self.revision_index.record(source_url, post_id, hashes)
+            return 'untracked'
+        
+        post_id, stored_hashes = stored
+        changed = [field for field in hashes if hashes[field] != stored_hashes.get(field)]
+        if not changed:
+            return 'unchanged'
+        
+        patch = {}
+        for field in changed:
+            if field != 'main_image':
+                patch[PostRevisionIndex.FIELDS[field]] = article_data[field]
+            elif not article_data['main_image']:
+                patch['featured_media'] = 0
+            else:
+                # La imagen solo se vuelve a subir cuando cambió
+                filename = os.path.basename(urlparse(article_data['main_image']).path)
+                if not filename or '.' not in filename:
+                    filename = f"imagen_{int(time.time())}.jpg"
+                media_id = self.upload_image(article_data['main_image'], filename)
+                if media_id:
+                    patch['featured_media'] = media_id
+                else:
+                    # Se reintenta en la próxima revisión
+                    hashes['main_image'] = stored_hashes.get('main_image')
+        
+        if not patch:
+            return 'error'
+        
+        try:
+            with self.metrics.span('post_update'):
+                response = self.api_request('PATCH', f"{self.site_url}/wp-json/wp/v2/posts/{post_id}", json=patch)
+        except Exception as e:
+            print(f"❌ Error actualizando post {post_id}: {e}")
+            return 'error'
+        
+        if response.status_code != 200:
+            print(f"❌ Error actualizando post {post_id}: {response.status_code}")
+            print(f"   Respuesta: {response.text[:200]}")
+            return 'error'
+        
+        self.revision_index.record(source_url, post_id, hashes)
+        if self.post_index is not None and 'title' in patch:
+            self.post_index.add(post_id, article_data['title'], source_url)
+        print(f"   ✏️ Post actualizado ({', '.join(patch)}): {article_data['title'][:50]}...")
+        return 'updated'
+    
+    def get_batch_max_items(self):
+        """Tamaño máximo de lote de /batch/v1, o None si el sitio no soporta lotes"""
+        if self.batch_checked:
+            return self.batch_max_items
+        
+        self.batch_checked = True
+        try:
+            response = self.api_request('OPTIONS', f"{self.site_url}/wp-json/batch/v1")
             if response.status_code == 200:
-                posts = response.json()
-                return [{'title': post['title']['rendered'], 'id': post['id']} for post in posts]
-            else:
-                print(f"❌ Error obteniendo posts de '{category_name}': {response.status_code}")
-                return []
-                
+                endpoints = response.json().get('endpoints') or [{}]
+                requests_arg = endpoints[0].get('args', {}).get('requests', {})
+                self.batch_max_items = int(requests_arg.get('maxItems', 25))
         except Exception as e:
-            print(f"❌ Error obteniendo posts de '{category_name}': {e}")
-            return []
+            print(f"⚠️ No se pudo consultar /batch/v1: {e}")
+        
+        return self.batch_max_items
     
-    def post_exists(self, title, category_name):
-        """Verifica si un post ya existe por título exacto"""
-        recent_posts = self.get_recent_posts_by_category(category_name, 5)
+    def send_batch(self, items):
+        """Envía un lote de posts preparados; retorna la lista de resultados (True/False)"""
+        api_url = f"{self.site_url}/wp-json/batch/v1"
+        payload = {
+            'validation': 'normal',
+            'requests': [
+                {'method': 'POST', 'path': '/wp/v2/posts', 'body': post_data}
+                for _, post_data in items
+            ]
+        }
         
-        for post in recent_posts:
-            if post['title'].strip() == title.strip():
-                return True
+        with self.metrics.span('post_batch'):
+            response = self.api_request('POST', api_url, json=payload)
+        if response.status_code in BATCH_REJECTED_STATUSES:
+            raise BatchRejectedError(f"lote rechazado ({response.status_code})")
         
-        return False
+        # Con un 5xx el servidor pudo haber creado parte de los posts: no se reenvían aquí,
+        # quedan en el outbox y se verifican contra el índice antes del reintento
+        if response.status_code not in (200, 207):
+            print(f"   ❌ Error en lote: {response.status_code}")
+            for article_data, _ in items:
+                self.record_failure(article_data, f"lote HTTP {response.status_code}: {response.text[:200]}")
+            return [False] * len(items)
+        
+        results = []
+        responses = response.json().get('responses', [])
+        for (article_data, post_data), item in zip(items, responses):
+            body = item.get('body') or {}
+            results.append(self.handle_post_response(
+                item.get('status'), body, article_data, post_data, json.dumps(body, ensure_ascii=False)
+            ))
+        
+        # Un lote con menos respuestas que requests deja el resto como error
+        for article_data, _ in items[len(responses):]:
+            self.record_failure(article_data, 'sin respuesta en el lote')
+            results.append(False)
+        return results
     
-    def upload_image(self, image_url, filename):
-        """Sube una imagen a WordPress y retorna el ID del attachment"""
-        try:
-            # Descargar la imagen
-            print(f"   📥 Descargando imagen: {image_url[:50]}...")
-            img_response = requests.get(image_url, timeout=30)
-            img_response.raise_for_status()
+    def create_posts_batch(self, articles, workers=4):
+        """Crea varios posts usando /batch/v1; sin soporte de lotes usa requests concurrentes"""
+        max_items = self.get_batch_max_items()
+        
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            if not max_items:
+                print(f"   ℹ️ Sin soporte de lotes: publicando con {workers} requests concurrentes")
+                return list(executor.map(self.create_post, articles))
             
-            # Determinar tipo de contenido
-            content_type = img_response.headers.get('content-type', 'image/jpeg')
+            # Las imágenes se suben antes (los lotes no admiten media) y en paralelo
+            def prepare(article_data):
+                try:
+                    return self.prepare_post(article_data)
+                except Exception as e:
+                    self.record_failure(article_data, e)
+                    print(f"❌ Error preparando post: {e}")
+                    return None
             
-            # Preparar datos para upload
-            files = {
-                'file': (filename, img_response.content, content_type)
-            }
+            prepared = list(executor.map(prepare, articles))
+        
+        results = [False] * len(articles)
+        pending = [(i, article, post_data) for i, (article, post_data)
+                   in enumerate(zip(articles, prepared)) if post_data is not None]
+        
+        for start in range(0, len(pending), max_items):
+            chunk = pending[start:start + max_items]
+            print(f"   📦 Enviando lote de {len(chunk)} posts...")
             
-            # Headers para upload (sin Content-Type para multipart)
-            upload_headers = {
-                'Authorization': f'Basic {self.token}'
-            }
+            try:
+                chunk_results = self.send_batch([(article, post_data) for _, article, post_data in chunk])
+            except BatchRejectedError as e:
+                # Lote rechazado sin procesar: es seguro enviar cada post por separado
+                print(f"   ⚠️ {e}. Enviando posts individualmente...")
+                chunk_results = []
+                for _, article, post_data in chunk:
+                    try:
+                        chunk_results.append(self.send_post(article, post_data))
+                    except Exception as error:
+                        self.record_failure(article, error)
+                        print(f"❌ Error creando post: {error}")
+                        chunk_results.append(False)
+            except Exception as e:
+                # Timeout o corte: no se sabe qué posts se crearon, así que ninguno se reenvía ahora
+                print(f"   ❌ Error en lote: {e}. Los posts quedan pendientes en el outbox")
+                chunk_results = []
+                for _, article, _ in chunk:
+                    self.record_failure(article, e)
+                    chunk_results.append(False)
             
-            # Subir imagen a WordPress
-            api_url = f"{self.site_url}/wp-json/wp/v2/media"
-            upload_response = requests.post(api_url, headers=upload_headers, files=files)
+            for (i, _, _), result in zip(chunk, chunk_results):
+                results[i] = result
+        
+        return results
+
+class SyncPipeline:
+    """Pipeline extracción → verificación → publicación unido por colas acotadas"""
+    def __init__(self, extractor, wordpress_api, extract_workers=2, dedup_workers=1,
+                 publish_workers=2, queue_size=4):
+        self.extractor = extractor
+        self.wordpress_api = wordpress_api
+        self.extract_workers = max(1, extract_workers)
+        self.dedup_workers = max(1, dedup_workers)
+        self.publish_workers = max(1, publish_workers)
+        
+        # Colas acotadas: una etapa lenta frena a la anterior (backpressure)
+        self.category_queue = queue.Queue()
+        self.dedup_queue = queue.Queue(maxsize=queue_size)
+        self.publish_queue = queue.Queue(maxsize=queue_size)
+        
+        self.stats = {'extracted': 0, 'existing': 0, 'created': 0, 'updated': 0, 'errors': 0}
+        self.stats_lock = threading.Lock()
+    
+    def count(self, key):
+        """Incrementa un contador de estadísticas"""
+        with self.stats_lock:
+            self.stats[key] += 1
+    
+    def extract_stage(self):
+        """Etapa 1: extrae las noticias de cada categoría y las envía a verificación"""
+        while True:
+            try:
+                category_name, category_url = self.category_queue.get_nowait()
+            except queue.Empty:
+                return
             
-            if upload_response.status_code == 201:
-                media_data = upload_response.json()
-                print(f"   ✅ Imagen subida exitosamente (ID: {media_data['id']})")
-                return media_data['id']
+            log = []
+            try:
+                for article_data in self.extractor.iter_category_news(category_name, category_url, log):
+                    self.count('extracted')
+                    self.dedup_queue.put(article_data)
+            except Exception as e:
+                log.append(f"   ❌ Error procesando categoría '{category_name}': {e}")
+            print("\n".join(log))
+    
+    def dedup_stage(self):
+        """Etapa 2: descarta las noticias que ya existen en WordPress"""
+        while True:
+            news = self.dedup_queue.get()
+            if news is None:
+                return
+            
+            try:
+                if self.wordpress_api.is_duplicate(news):
+                    self.count('existing')
+                    self.extractor.mark_synced(news['url'])
+                    print(f"   ⚠️ Ya existe: {news['title'][:50]}...")
+                    
+                    if self.wordpress_api.update_posts:
+                        result = self.wordpress_api.update_post(news)
+                        if result == 'updated':
+                            self.count('updated')
+                        elif result == 'error':
+                            self.count('errors')
+                else:
+                    print(f"   ✅ Nuevo: {news['title'][:50]}...")
+                    self.publish_queue.put(news)
+            except Exception as e:
+                self.count('errors')
+                print(f"   ❌ Error verificando '{news['title'][:50]}': {e}")
+    
+    def publish_stage(self):
+        """Etapa 3: sube la imagen y crea el post"""
+        while True:
+            news = self.publish_queue.get()
+            if news is None:
+                return
+            
+            print(f"\n   🔄 Creando: {news['title'][:50]}...")
+            if self.wordpress_api.create_post(news):
+                self.count('created')
+                self.extractor.mark_synced(news['url'])
             else:
-                print(f"   ❌ Error subiendo imagen: {upload_response.status_code}")
-                return None
-                
+                self.count('errors')
+    
+    def start_workers(self, target, count):
+        """Lanza los hilos de una etapa"""
+        threads = [threading.Thread(target=target, daemon=True) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        return threads
+    
+    def run(self):
+        """Ejecuta el pipeline completo y retorna las estadísticas"""
+        for item in self.extractor.categories.items():
+            self.category_queue.put(item)
+        
+        extractors = self.start_workers(self.extract_stage, self.extract_workers)
+        checkers = self.start_workers(self.dedup_stage, self.dedup_workers)
+        publishers = self.start_workers(self.publish_stage, self.publish_workers)
+        
+        # Cada etapa se cierra con un centinela por hilo cuando termina la anterior
+        for thread in extractors:
+            thread.join()
+        for _ in checkers:
+            self.dedup_queue.put(None)
+        for thread in checkers:
+            thread.join()
+        for _ in publishers:
+            self.publish_queue.put(None)
+        for thread in publishers:
+            thread.join()
+        
+        return self.stats
+
+
+class BackfillCrawler:
+    """Recorre las páginas 1..N de cada categoría para recuperar noticias atrasadas"""
+    def __init__(self, extractor, max_pages=50, since=None, page_workers=4, checkpoint_path=None,
+                 max_retries=3, deep=False):
+        self.extractor = extractor
+        self.max_pages = max(1, max_pages)
+        # Por omisión se detiene en la primera noticia ya sincronizada; en modo profundo,
+        # solo en una página completamente sincronizada
+        self.deep = deep
+        self.max_retries = max(1, max_retries)
+        self.since = since
+        self.page_workers = max(1, page_workers)
+        self.checkpoint_path = checkpoint_path or os.path.join(STATE_DIR, 'backfill_checkpoint.json')
+        self.checkpoint = self.load_checkpoint()
+    
+    def load_checkpoint(self):
+        """Carga el avance de un backfill interrumpido"""
+        try:
+            with open(self.checkpoint_path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def save_checkpoint(self):
+        """Guarda el avance de forma atómica"""
+        directory = os.path.dirname(self.checkpoint_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = self.checkpoint_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.checkpoint, f, ensure_ascii=False)
+        os.replace(temp_path, self.checkpoint_path)
+    
+    def finish(self):
+        """Elimina el checkpoint cuando todas las categorías terminaron"""
+        if all(state.get('done') and not state.get('failed') for state in self.checkpoint.values()):
+            try:
+                os.remove(self.checkpoint_path)
+            except OSError:
+                pass
+    
+    def fetch_page_urls(self, category_name, category_url, page):
+        """URLs de noticias de una página del listado ([] si no existe, None si falló la descarga)"""
+        page_url = self.extractor.page_url(category_url, page)
+        if not page_url:
+            return []
+        try:
+            return self.extractor.fetch_news_urls(page_url, limit=1000, category=category_name)
+        except requests.HTTPError as e:
+            if e.response is not None and e.response.status_code == 404:
+                return []
+            print(f"   ⚠️ {category_name}: error descargando página {page}: {e}")
+            return None
         except Exception as e:
-            print(f"   ❌ Error procesando imagen: {e}")
+            print(f"   ⚠️ {category_name}: error descargando página {page}: {e}")
             return None
     
-    def create_post(self, article_data):
-        """Crea un nuevo post en WordPress con imagen destacada"""
-        try:
-            category_id = self.get_category_id(article_data['category'])
-            if not category_id:
-                print(f"❌ No se pudo obtener ID de categoría '{article_data['category']}'")
-                return False
+    def pending_urls(self, state, news_urls):
+        """URLs de la página aún no sincronizadas; retorna (pendientes, se_alcanzó_lo_sincronizado)"""
+        seen_index = self.extractor.seen_index
+        if not seen_index:
+            return news_urls, False
+        
+        unseen = set(seen_index.filter_unseen(news_urls))
+        if self.deep:
+            pending = [url for url in news_urls if url in unseen]
+            return pending, not pending
+        
+        # Las noticias ya publicadas por este mismo backfill no marcan dónde quedó la sincronización
+        crawled = set(state.get('crawled', []))
+        pending = []
+        for url in news_urls:
+            if url in unseen:
+                pending.append(url)
+            elif normalize_url(url) not in crawled:
+                return pending, True
+        return pending, False
+    
+    def is_older_than_cutoff(self, article_data):
+        """Indica si la noticia es anterior a la fecha de corte"""
+        if not self.since:
+            return False
+        article_date = parse_spanish_date(article_data['date_time'].get('date', ''))
+        return article_date is not None and article_date < self.since
+    
+    def extract_articles(self, executor, state, category_name, urls):
+        """Extrae las noticias de una lista de URLs; las que fallan quedan en el checkpoint para reintentarse"""
+        failed = state.setdefault('failed', {})
+        reached_cutoff = False
+        articles = []
+        for url, article_data in zip(urls, executor.map(self.extractor.extract_article_content, urls)):
+            if not article_data or not article_data['title']:
+                attempts = failed.get(url, 0) + 1
+                if attempts >= self.max_retries:
+                    print(f"   ⚠️ {category_name}: se descarta {url} tras {attempts} intento(s) fallido(s)")
+                    failed.pop(url, None)
+                else:
+                    failed[url] = attempts
+                continue
+            failed.pop(url, None)
+            if self.is_older_than_cutoff(article_data):
+                reached_cutoff = True
+                continue
+            article_data['category'] = category_name
+            articles.append(article_data)
+        return articles, reached_cutoff
+    
+    def iter_category(self, executor, category_name, category_url):
+        """Genera, página a página, las listas de noticias atrasadas de una categoría"""
+        state = self.checkpoint.setdefault(category_name, {'next_page': 1, 'done': False})
+        
+        # Primero se reintentan las noticias que fallaron en ejecuciones anteriores
+        retry_urls = list(state.get('failed', {}))
+        if retry_urls:
+            print(f"   🔁 {category_name}: reintentando {len(retry_urls)} noticia(s) que fallaron")
+            retried_articles, _ = self.extract_articles(executor, state, category_name, retry_urls)
+            if retried_articles:
+                yield retried_articles
+            self.save_checkpoint()
+        
+        while not state['done']:
+            first_page = state['next_page']
+            pages = range(first_page, min(first_page + self.page_workers, self.max_pages + 1))
+            if not pages:
+                state['done'] = True
+                break
             
-            # Subir imagen destacada si existe
-            featured_image_id = None
-            if article_data['main_image']:
-                print(f"   🖼️ Procesando imagen destacada...")
+            # Las páginas de la ventana se descargan en paralelo (con el rate limit del extractor)
+            page_urls = list(executor.map(
+                lambda page: self.fetch_page_urls(category_name, category_url, page), pages
+            ))
+            
+            stopped = False
+            for page, news_urls in zip(pages, page_urls):
+                # Error de descarga: el checkpoint queda en esta página para la próxima ejecución
+                if news_urls is None:
+                    print(f"   ⏸️ {category_name}: se reintentará desde la página {page}")
+                    stopped = True
+                    break
                 
-                # Generar nombre de archivo único
-                parsed_url = urlparse(article_data['main_image'])
-                filename = os.path.basename(parsed_url.path)
-                if not filename or '.' not in filename:
-                    filename = f"imagen_{int(time.time())}.jpg"
+                unseen_urls, reached_synced = self.pending_urls(state, news_urls)
                 
-                featured_image_id = self.upload_image(article_data['main_image'], filename)
-            
-            # Preparar datos del post
-            post_data = {
-                'title': article_data['title'],
-                'content': article_data['content'],
-                'excerpt': article_data['subtitle'],
-                'status': 'publish',
-                'categories': [category_id],
-                'meta': {
-                    'pura_noticia_url': article_data['url']
-                }
-            }
+                # Fin del listado o se alcanzó lo ya sincronizado: no hay más atrasos
+                if not news_urls or not unseen_urls:
+                    print(f"   ⏹️ {category_name}: detenido en página {page}")
+                    state['done'] = True
+                    break
+                
+                # Las que esperan un reintento en el outbox se publican desde ahí
+                unseen_urls = self.extractor.filter_queued(unseen_urls)
+                print(f"   📄 {category_name} página {page}: {len(unseen_urls)} noticia(s) pendiente(s)")
+                page_articles, reached_cutoff = self.extract_articles(
+                    executor, state, category_name, unseen_urls
+                )
+                
+                if page_articles:
+                    yield page_articles
+                
+                # Las noticias de la página ya fueron publicadas y las fallidas quedaron
+                # registradas para reintentarse: se avanza el checkpoint
+                state.setdefault('crawled', []).extend(normalize_url(url) for url in unseen_urls)
+                state['next_page'] = page + 1
+                if reached_synced or reached_cutoff or page >= self.max_pages:
+                    if reached_synced:
+                        print(f"   ⏹️ {category_name}: alcanzada la última noticia sincronizada en página {page}")
+                    state['done'] = True
+                self.save_checkpoint()
+                if state['done']:
+                    break
             
-            # Agregar imagen destacada si se subió exitosamente
-            if featured_image_id:
-                post_data['featured_media'] = featured_image_id
-                print(f"   🎯 Imagen destacada asignada (ID: {featured_image_id})")
+            if state['done']:
+                state.pop('crawled', None)
+            self.save_checkpoint()
+            if stopped:
+                break
+    
+    def iter_pages(self):
+        """Genera las noticias atrasadas de todas las categorías, una lista por página"""
+        with ThreadPoolExecutor(max_workers=self.page_workers) as executor:
+            for category_name, category_url in self.extractor.categories.items():
+                print(f"📚 Backfill de categoría: {category_name}")
+                yield from self.iter_category(executor, category_name, category_url)
+        
+        self.finish()
+
+
+def run_backfill(extractor, wordpress_api):
+    """Recupera noticias atrasadas recorriendo el historial de las categorías"""
+    since = os.getenv('BACKFILL_SINCE')
+    crawler = BackfillCrawler(
+        extractor,
+        max_pages=env_int('BACKFILL_MAX_PAGES', 50),
+        since=datetime.strptime(since, '%Y-%m-%d').date() if since else None,
+        page_workers=env_int('BACKFILL_PAGE_WORKERS', 4),
+        max_retries=env_int('BACKFILL_MAX_RETRIES', 3),
+        deep=os.getenv('BACKFILL_DEEP', '0') == '1'
+    )
+    
+    stats = {'extracted': 0, 'existing': 0, 'created': 0, 'updated': 0, 'errors': 0}
+    load_dedup_index(wordpress_api)
+    
+    # Cada página se publica antes de pedir la siguiente, así el checkpoint
+    # solo avanza sobre noticias ya publicadas y no se acumulan en memoria
+    for page_articles in crawler.iter_pages():
+        publish_articles(extractor, wordpress_api, page_articles, stats)
+    
+    return stats
+
+
+def drain_outbox(extractor, wordpress_api):
+    """Publica primero lo que quedó pendiente en ejecuciones anteriores; retorna sus estadísticas"""
+    stats = {'extracted': 0, 'existing': 0, 'created': 0, 'updated': 0, 'errors': 0}
+    if wordpress_api.outbox is None:
+        return stats
+    
+    pending = wordpress_api.outbox.due()
+    waiting, dead = wordpress_api.outbox.counts()
+    if dead:
+        print(f"⚠️ Outbox: {dead} publicación(es) agotaron sus reintentos (ver last_error en outbox.sqlite3)")
+    if not pending:
+        if waiting:
+            print(f"📮 Outbox: {waiting} publicación(es) esperando su próximo reintento")
+        return stats
+    
+    print(f"\n📮 Outbox: reintentando {len(pending)} publicación(es) pendiente(s)...")
+    load_dedup_index(wordpress_api)
+    publish_articles(extractor, wordpress_api, pending, stats)
+    
+    # Lo extraído en ejecuciones anteriores no cuenta como extracción de esta
+    stats['extracted'] = 0
+    return stats
+
+
+def merge_stats(stats, extra):
+    """Suma las estadísticas de otra etapa (p. ej. el outbox) a las de la ejecución"""
+    for key, value in extra.items():
+        stats[key] = stats.get(key, 0) + value
+    return stats
+
+
+def update_existing(wordpress_api, news, stats):
+    """En modo actualización, lleva al post ya publicado los cambios de su noticia de origen"""
+    if not wordpress_api.update_posts:
+        return
+    
+    result = wordpress_api.update_post(news)
+    if result == 'updated':
+        stats['updated'] += 1
+    elif result == 'error':
+        stats['errors'] += 1
+
+
+def publish_articles(extractor, wordpress_api, articles, stats):
+    """Verifica y publica un grupo de noticias, actualizando stats; retorna cuántas se crearon"""
+    news_to_create = []
+    for news in articles:
+        stats['extracted'] += 1
+        if wordpress_api.is_duplicate(news):
+            stats['existing'] += 1
+            extractor.mark_synced(news['url'])
+            update_existing(wordpress_api, news, stats)
+        else:
+            news_to_create.append(news)
+    
+    if os.getenv('WP_BATCH_PUBLISH', '0') == '1':
+        results = wordpress_api.create_posts_batch(news_to_create, env_int('WP_PUBLISH_WORKERS', 4))
+    else:
+        results = []
+        for news in news_to_create:
+            print(f"\n   🔄 Creando: {news['title'][:50]}...")
+            results.append(wordpress_api.create_post(news))
+    
+    created = 0
+    for news, result in zip(news_to_create, results):
+        if result:
+            created += 1
+            extractor.mark_synced(news['url'])
+        else:
+            stats['errors'] += 1
+    stats['created'] += created
+    return created
+
+
+class CategorySchedule:
+    """Intervalo de consulta adaptativo por categoría: se acorta con noticias nuevas y se alarga sin ellas"""
+    def __init__(self, categories, min_interval=120, max_interval=1800, path=None):
+        self.min_interval = max(1, min_interval)
+        self.max_interval = max(self.min_interval, max_interval)
+        self.path = path
+        
+        # Los intervalos aprendidos se conservan entre reinicios; todas parten vencidas
+        saved = self.load()
+        now = time.monotonic()
+        self.intervals = {
+            name: min(self.max_interval, max(self.min_interval, saved.get(name, self.min_interval)))
+            for name in categories
+        }
+        self.next_due = {name: now for name in categories}
+    
+    def load(self):
+        """Carga los intervalos guardados"""
+        if not self.path:
+            return {}
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def save(self):
+        """Guarda los intervalos de forma atómica"""
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.intervals, f, ensure_ascii=False)
+        os.replace(temp_path, self.path)
+    
+    def due(self):
+        """Categorías que ya deben consultarse"""
+        now = time.monotonic()
+        return [name for name, due_at in self.next_due.items() if due_at <= now]
+    
+    def seconds_until_next(self):
+        """Segundos hasta la próxima categoría vencida"""
+        return max(0.0, min(self.next_due.values()) - time.monotonic())
+    
+    def update(self, name, busy):
+        """Ajusta el intervalo de una categoría según si tuvo noticias nuevas"""
+        interval = self.intervals[name] / 2 if busy else self.intervals[name] * 1.5
+        self.intervals[name] = min(self.max_interval, max(self.min_interval, interval))
+        self.next_due[name] = time.monotonic() + self.intervals[name]
+        return self.intervals[name]
+
+
+class WatchDaemon:
+    """Modo continuo: sesiones, caches e índices quedan en memoria entre consultas"""
+    def __init__(self, extractor, wordpress_api, schedule, stop_event=None,
+                 index_refresh=1800, max_runtime=0):
+        self.extractor = extractor
+        self.wordpress_api = wordpress_api
+        self.schedule = schedule
+        self.stop_event = stop_event or threading.Event()
+        self.index_refresh = index_refresh
+        self.max_runtime = max_runtime
+        self.stats = {'extracted': 0, 'existing': 0, 'created': 0, 'updated': 0, 'errors': 0}
+        self.cycles = 0
+    
+    def install_signal_handlers(self):
+        """SIGTERM y SIGINT terminan la consulta en curso y detienen el ciclo"""
+        def stop(signum, frame):
+            print(f"\n🛑 Señal {signal.Signals(signum).name} recibida, deteniendo al terminar la consulta en curso...")
+            self.stop_event.set()
+        
+        # Solo el hilo principal puede instalar handlers (p. ej. no en un hilo de pruebas)
+        previous = {}
+        if threading.current_thread() is threading.main_thread():
+            for signum in (signal.SIGTERM, signal.SIGINT):
+                previous[signum] = signal.signal(signum, stop)
+        return previous
+    
+    def run_cycle(self, due):
+        """Consulta las categorías vencidas y publica sus noticias nuevas"""
+        categories = self.extractor.categories
+        workers = min(self.extractor.max_workers, len(due)) or 1
+        
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(lambda name: self.extractor.process_category(name, categories[name]), due)
             
-            # Crear el post
-            api_url = f"{self.site_url}/wp-json/wp/v2/posts"
-            response = requests.post(api_url, headers=self.headers, json=post_data)
-            
-            if response.status_code == 201:
-                post = response.json()
-                print(f"✅ Post creado: {post['title']['rendered']}")
-                print(f"   URL: {post['link']}")
-                if featured_image_id:
-                    print(f"   🖼️ Con imagen destacada")
-                return True
-            else:
-                print(f"❌ Error creando post: {response.status_code}")
-                print(f"   Respuesta: {response.text[:200]}")
-                return False
+            for name, (articles, log) in zip(due, results):
+                print("\n".join(log))
+                created = publish_articles(self.extractor, self.wordpress_api, articles, self.stats)
+                interval = self.schedule.update(name, created > 0)
+                print(f"   ⏲️ {name}: próxima consulta en {interval / 60:.1f} min")
+                
+                # Las categorías que no alcanzaron a publicarse quedan pendientes (no marcadas como vistas)
+                if self.stop_event.is_set():
+                    break
+    
+    def run(self):
+        """Consulta las categorías según su intervalo hasta recibir una señal de término"""
+        previous_handlers = self.install_signal_handlers()
+        metrics = self.wordpress_api.metrics
+        started = time.monotonic()
+        last_refresh = started
+        
+        try:
+            while not self.stop_event.is_set():
+                if self.max_runtime and time.monotonic() - started >= self.max_runtime:
+                    print("⏹️ Tiempo máximo de ejecución alcanzado")
+                    break
                 
+                due = self.schedule.due()
+                if due:
+                    merge_stats(self.stats, drain_outbox(self.extractor, self.wordpress_api))
+                    
+                    # El índice de duplicados se pone al día con los posts creados fuera de este proceso
+                    if self.wordpress_api.post_index is not None and \
+                            time.monotonic() - last_refresh >= self.index_refresh:
+                        self.wordpress_api.load_post_index()
+                        self.wordpress_api.forget_missing_categories()
+                        last_refresh = time.monotonic()
+                    
+                    with metrics.span('sync_stage', stage='watch_cycle'):
+                        self.run_cycle(due)
+                    self.cycles += 1
+                    
+                    if self.extractor.http_cache:
+                        self.extractor.http_cache.evict()
+                    self.schedule.save()
+                    
+                    for key, value in self.stats.items():
+                        metrics.gauge('news', value, result=key)
+                    metrics.gauge('watch_cycles', self.cycles)
+                    export_metrics(metrics)
+                
+                wait = self.schedule.seconds_until_next()
+                if self.max_runtime:
+                    wait = min(wait, max(0.0, self.max_runtime - (time.monotonic() - started)))
+                self.stop_event.wait(wait)
+        finally:
+            for signum, handler in previous_handlers.items():
+                signal.signal(signum, handler)
+            self.schedule.save()
+        
+        return self.stats
+
+
+def run_watch(extractor, wordpress_api):
+    """Ejecuta el modo continuo con la configuración de las variables de entorno"""
+    load_dedup_index(wordpress_api)
+    
+    schedule = CategorySchedule(
+        extractor.categories,
+        min_interval=env_float('WATCH_MIN_INTERVAL_MINUTES', 2) * 60,
+        max_interval=env_float('WATCH_MAX_INTERVAL_MINUTES', 30) * 60,
+        path=os.path.join(STATE_DIR, 'watch_schedule.json')
+    )
+    daemon = WatchDaemon(
+        extractor,
+        wordpress_api,
+        schedule,
+        index_refresh=env_float('WATCH_INDEX_REFRESH_MINUTES', 30) * 60,
+        max_runtime=env_float('WATCH_MAX_RUNTIME_MINUTES', 0) * 60
+    )
+    return daemon.run()
+
+
+class SyncedTracker:
+    """Marca una noticia como sincronizada recién cuando todos los destinos la tienen"""
+    def __init__(self, extractor, destinations):
+        self.extractor = extractor
+        self.destinations = set(destinations)
+        self.confirmed = {}
+        self.lock = threading.Lock()
+    
+    def confirm(self, url, destination):
+        """Registra que un destino ya tiene la noticia"""
+        with self.lock:
+            confirmed = self.confirmed.setdefault(url, set())
+            confirmed.add(destination)
+            complete = confirmed >= self.destinations
+        if complete:
+            self.extractor.mark_synced(url)
+    
+    def for_destination(self, destination):
+        """Reemplazo del extractor para publish_articles: mark_synced confirma por un destino"""
+        return SimpleNamespace(mark_synced=lambda url: self.confirm(url, destination))
+
+
+def publish_to_destination(name, wordpress_api, articles, tracker):
+    """Vacía el outbox del destino y le publica las noticias que le corresponden; retorna sus estadísticas"""
+    stats = {'extracted': 0, 'existing': 0, 'created': 0, 'updated': 0, 'errors': 0}
+    marker = tracker.for_destination(name)
+    
+    # Cada destino trabaja sobre su propia copia; las categorías asociadas a null se omiten
+    accepted = []
+    for news in articles:
+        if news['category'] in wordpress_api.category_aliases and not wordpress_api.category_aliases[news['category']]:
+            marker.mark_synced(news['url'])
+        else:
+            accepted.append(dict(news))
+    
+    with wordpress_api.metrics.span('destination_publish', destination=name):
+        try:
+            merge_stats(stats, drain_outbox(marker, wordpress_api))
+            if accepted:
+                load_dedup_index(wordpress_api)
+                publish_articles(marker, wordpress_api, accepted, stats)
         except Exception as e:
-            print(f"❌ Error creando post: {e}")
-            return False
+            # Un destino caído no detiene a los demás
+            print(f"❌ [{name}] Error publicando: {e}")
+            stats['errors'] += 1
+    return stats
+
+
+def run_fanout(extractor, destinations):
+    """Extrae las noticias una sola vez y las publica en todos los destinos en paralelo"""
+    metrics = extractor.metrics
+    
+    print(f"🔐 PASO 1: Probando conexión con {len(destinations)} destino(s)...")
+    with ThreadPoolExecutor(max_workers=len(destinations)) as executor:
+        connected = dict(zip(destinations, executor.map(lambda api: api.test_connection(), destinations.values())))
+    for name, ok in connected.items():
+        if not ok:
+            print(f"   ❌ {name}: sin conexión, se omite en esta ejecución")
+    active = {name: api for name, api in destinations.items() if connected[name]}
+    if not active:
+        print("❌ No se pudo conectar con ningún destino. Verifica WP_DESTINATIONS.")
+        return False
+    extractor.outboxes = [api.outbox for api in active.values() if api.outbox is not None]
+    
+    print("\n📰 PASO 2: Extrayendo noticias de Pura Noticia...")
+    with metrics.span('sync_stage', stage='extract'):
+        extracted_news = extractor.extract_latest_news()
+    if extractor.http_cache:
+        extractor.http_cache.evict()
+    
+    # Solo se marca como sincronizado lo que quedó en todos los destinos, incluidos los caídos
+    print(f"\n📡 PASOS 3-4: Publicando en {len(active)} destino(s) en paralelo...")
+    tracker = SyncedTracker(extractor, destinations)
+    with metrics.span('sync_stage', stage='fanout'):
+        with ThreadPoolExecutor(max_workers=len(active)) as executor:
+            futures = {
+                name: executor.submit(publish_to_destination, name, api, extracted_news, tracker)
+                for name, api in active.items()
+            }
+            results = {name: future.result() for name, future in futures.items()}
+    
+    print_fanout_summary(len(extracted_news), results, extractor, active)
+    return True
+
+
+def create_wordpress_api(site_url, username, app_password, **options):
+    """Crea el cliente de WordPress según las variables de entorno (options tiene prioridad)"""
+    wordpress_api = WordPressAPI(site_url, username, app_password, **{
+        'category_ttl': env_int('WP_CATEGORY_CACHE_TTL_HOURS', 24) * 3600,
+        'pool_size': env_int('WP_POOL_SIZE', 10),
+        'connect_timeout': env_float('WP_CONNECT_TIMEOUT', 5),
+        'read_timeout': env_float('WP_READ_TIMEOUT', 30),
+        'max_retries': env_int('WP_MAX_RETRIES', 3),
+        'requests_per_second': env_float('WP_REQUESTS_PER_SECOND', 0),
+        **options
+    })
+    
+    if os.getenv('WP_MEDIA_INDEX', '1') != '0':
+        wordpress_api.media_index = MediaIndex(wordpress_api.state_path('media_index.sqlite3'))
+    
+    # Los hashes se guardan siempre, así el modo actualización tiene con qué comparar
+    if os.getenv('WP_REVISION_INDEX', '1') != '0':
+        wordpress_api.revision_index = PostRevisionIndex(wordpress_api.state_path('post_revisions.sqlite3'))
+    wordpress_api.update_posts = os.getenv('SYNC_UPDATE', '0') == '1'
+    
+    if os.getenv('WP_IMAGE_OPTIMIZE', '0') == '1':
+        if Image is None:
+            print("⚠️ Pillow no está instalado, las imágenes se suben sin optimizar")
+        else:
+            wordpress_api.image_optimizer = ImageOptimizer(
+                max_width=env_int('WP_IMAGE_MAX_WIDTH', 1600),
+                quality=env_int('WP_IMAGE_QUALITY', 82),
+                image_format=os.getenv('WP_IMAGE_FORMAT', 'webp'),
+                workers=env_int('WP_IMAGE_WORKERS', 2)
+            )
+    
+    if os.getenv('WP_OUTBOX', '1') != '0':
+        wordpress_api.outbox = PublishOutbox(
+            wordpress_api.state_path('outbox.sqlite3'),
+            max_attempts=env_int('WP_OUTBOX_MAX_ATTEMPTS', 8),
+            backoff=env_float('WP_OUTBOX_BACKOFF_MINUTES', 5) * 60
+        )
+    
+    # Umbral de similitud de Jaccard estimada entre textos (título + contenido)
+    if os.getenv('WP_NEAR_DUP_INDEX', '1') != '0':
+        wordpress_api.near_dup_index = NearDuplicateIndex(
+            wordpress_api.state_path('near_dup_index.sqlite3'),
+            threshold=env_float('WP_NEAR_DUP_THRESHOLD', 0.8),
+            window_days=env_int('WP_NEAR_DUP_WINDOW_DAYS', 30)
+        )
+    
+    return wordpress_api
+
+
+# Destinos de WP_DESTINATIONS: [{"name", "site_url", "username", "app_password" o "app_password_env",
+# "categories": {"Nacional": "Chile", "Deportes": null}, ...}] (null = no publicar esa categoría ahí);
+# estas opciones se pasan tal cual a WordPressAPI
+DESTINATION_OPTIONS = ('pool_size', 'connect_timeout', 'read_timeout', 'max_retries', 'requests_per_second')
+
+
+def create_destinations(config):
+    """Crea un cliente por destino de WP_DESTINATIONS, cada uno con su estado; retorna {nombre: WordPressAPI}"""
+    destinations = {}
+    for destination in config:
+        app_password = destination.get('app_password') or os.getenv(destination.get('app_password_env', ''), '')
+        if not destination.get('site_url') or not destination.get('username') or not app_password:
+            raise ValueError(f"Destino incompleto en WP_DESTINATIONS: {destination.get('name') or destination.get('site_url')}")
+        
+        name = destination.get('name') or urlparse(destination['site_url']).netloc
+        if name in destinations:
+            raise ValueError(f"Destino repetido en WP_DESTINATIONS: {name} (usa 'name' para distinguirlos)")
+        options = {key: destination[key] for key in DESTINATION_OPTIONS if key in destination}
+        destinations[name] = create_wordpress_api(
+            destination['site_url'], destination['username'], app_password,
+            category_aliases=destination.get('categories') or {}, **options
+        )
+    return destinations
+
+
+def create_extractor():
+    """Crea el extractor de Pura Noticia según las variables de entorno"""
+    seen_index = None
+    if os.getenv('PN_SEEN_INDEX', '1') != '0':
+        seen_index = SeenUrlIndex(os.path.join(STATE_DIR, 'seen_urls.sqlite3'))
+    
+    http_cache = None
+    if os.getenv('PN_HTTP_CACHE', '1') != '0':
+        http_cache = HttpCache(
+            os.path.join(STATE_DIR, 'http_cache.sqlite3'),
+            max_bytes=env_int('PN_HTTP_CACHE_MAX_MB', 50) * 1024 * 1024,
+            max_age=env_int('PN_HTTP_CACHE_MAX_AGE_HOURS', 72) * 3600
+        )
+    
+    # Feeds RSS/Atom o sitemaps por categoría: {"Nacional": "https://..."}
+    feed_discovery = None
+    category_feeds = json.loads(os.getenv('PN_CATEGORY_FEEDS') or '{}')
+    if category_feeds and os.getenv('PN_FEED_DISCOVERY', '1') != '0':
+        feed_discovery = FeedDiscovery(
+            category_feeds,
+            path=os.path.join(STATE_DIR, 'feed_watermarks.json'),
+            max_items=env_int('PN_FEED_MAX_ITEMS', 200)
+        )
+    
+    # Reglas de limpieza del contenido en un archivo JSON (se combinan con las por omisión)
+    content_transformer = None
+    if os.getenv('PN_CONTENT_RULES'):
+        content_transformer = ContentTransformer.from_file('https://puranoticia.pnt.cl', os.getenv('PN_CONTENT_RULES'))
+    
+    return PuraNoticiaExtractor(
+        max_workers=env_int('PN_MAX_WORKERS', 4),
+        max_per_host=env_int('PN_MAX_PER_HOST', 4),
+        requests_per_second=env_float('PN_REQUESTS_PER_SECOND', 8.0),
+        articles_per_category=env_int('PN_ARTICLES_PER_CATEGORY', 1),
+        seen_index=seen_index,
+        http_cache=http_cache,
+        parser=os.getenv('PN_HTML_PARSER', 'html.parser'),
+        fast_parse=os.getenv('PN_FAST_PARSE', '1') != '0',
+        category_rules=json.loads(os.getenv('PN_CATEGORY_URL_RULES') or '{}'),
+        revisit_synced=os.getenv('SYNC_UPDATE', '0') == '1',
+        feed_discovery=feed_discovery,
+        content_transformer=content_transformer
+    )
+
 
-def run_news_sync():
-    """Función principal para ejecutar la sincronización"""
+def load_dedup_index(wordpress_api):
+    """Prepara el índice local de duplicados si está habilitado"""
+    if os.getenv('WP_DEDUP_INDEX', '1') == '0':
+        return
+    
+    # Un índice ya abierto solo se pone al día (p. ej. después de vaciar el outbox)
+    if os.getenv('WP_DEDUP_PERSISTENT', '1') != '0' and wordpress_api.post_index is None:
+        wordpress_api.post_index = PostIndex(wordpress_api.state_path('post_index.sqlite3'))
+    if not wordpress_api.load_post_index(env_int('WP_DEDUP_WINDOW_DAYS', 7)):
+        # Sin índice confiable se vuelve a la consulta por categoría
+        wordpress_api.post_index = None
+
+
+# Etapas que se muestran en el resumen (todas las métricas van al archivo exportado)
+STAGE_METRICS = [
+    'sync_stage', 'feed_fetch', 'feed_parse', 'category_fetch', 'category_parse', 'article_fetch', 'article_parse',
+    'dedup_check', 'image_download', 'media_upload', 'post_create', 'post_batch', 'destination_publish'
+]
+
+
+def export_metrics(metrics):
+    """Exporta las métricas de la ejecución si SYNC_METRICS_FILE está definido"""
+    path = os.getenv('SYNC_METRICS_FILE')
+    if not path:
+        return
+    try:
+        metrics.export(path, os.getenv('SYNC_METRICS_FORMAT'))
+        print(f"📈 Métricas exportadas a {path}")
+    except OSError as e:
+        print(f"⚠️ No se pudieron exportar las métricas: {e}")
+
+
+def print_stage_timings(metrics):
+    """Imprime la tabla de tiempos por etapa"""
+    print(f"⏱️ TIEMPO POR ETAPA (llamadas, total, p95):")
+    for name in STAGE_METRICS:
+        for labels, stage_stats in sorted(metrics.timing_stats(name).items()):
+            label = name + ''.join(f" [{value}]" for _, value in labels)
+            print(f"   • {label}: {stage_stats['count']} llamadas, "
+                  f"{stage_stats['sum']:.2f}s, {stage_stats['p95']:.2f}s")
+
+
+def print_latency(wordpress_api, indent='   '):
+    """Imprime las latencias por endpoint de un sitio"""
+    for endpoint, endpoint_stats in sorted(wordpress_api.get_latency_stats().items()):
+        print(f"{indent}• {endpoint}: {endpoint_stats['count']} llamadas, "
+              f"{endpoint_stats['p50']:.2f}s / {endpoint_stats['p95']:.2f}s / {endpoint_stats['max']:.2f}s")
+
+
+def print_fanout_summary(extracted, results, extractor, destinations):
+    """Imprime el resumen de una ejecución multi-destino, con el detalle de cada sitio"""
+    print("\n" + "=" * 60)
+    print("🎉 SINCRONIZACIÓN COMPLETADA")
+    print("=" * 60)
+    print(f"📊 ESTADÍSTICAS FINALES:")
+    print(f"   • Noticias extraídas: {extracted}")
+    if extractor.http_cache:
+        print(f"   • {extractor.http_cache.summary()}")
+    
+    metrics = extractor.metrics
+    for name, stats in results.items():
+        wordpress_api = destinations[name]
+        print(f"🌐 {name}: {stats['created']} creadas, {stats['existing']} ya existentes, "
+              f"{stats.get('updated', 0)} actualizadas, {stats['errors']} errores")
+        if wordpress_api.image_optimizer:
+            print(f"   • {wordpress_api.image_optimizer.summary()}")
+        print_latency(wordpress_api)
+        for key, value in stats.items():
+            metrics.gauge('news', value, result=key, destination=name)
+    
+    print_stage_timings(metrics)
+    print("=" * 60)
+    
+    created = sum(stats['created'] for stats in results.values())
+    if created > 0:
+        print(f"✅ ¡Éxito! Se crearon {created} noticias nuevas en {len(results)} destino(s).")
+    else:
+        print("ℹ️ No había noticias nuevas para crear. Todas ya existían.")
+
+
+def print_summary(stats, extractor, wordpress_api):
+    """Imprime el resumen final de la sincronización"""
+    print("\n" + "=" * 60)
+    print("🎉 SINCRONIZACIÓN COMPLETADA")
+    print("=" * 60)
+    print(f"📊 ESTADÍSTICAS FINALES:")
+    print(f"   • Noticias extraídas: {stats['extracted']}")
+    print(f"   • Ya existentes: {stats['existing']}")
+    print(f"   • Nuevas creadas: {stats['created']}")
+    if stats.get('updated'):
+        print(f"   • Actualizadas: {stats['updated']}")
+    print(f"   • Errores: {stats['errors']}")
+    if extractor.http_cache:
+        print(f"   • {extractor.http_cache.summary()}")
+    if wordpress_api.image_optimizer:
+        print(f"   • {wordpress_api.image_optimizer.summary()}")
+    
+    metrics = wordpress_api.metrics
+    for key, value in stats.items():
+        metrics.gauge('news', value, result=key)
+    
+    print_stage_timings(metrics)
+    print(f"⏱️ LATENCIA WORDPRESS (p50 / p95 / máx):")
+    print_latency(wordpress_api)
+    print("=" * 60)
+    
+    if stats['created'] > 0:
+        print(f"✅ ¡Éxito! Se crearon {stats['created']} noticias nuevas en WordPress.")
+    else:
+        print("ℹ️ No había noticias nuevas para crear. Todas ya existían.")
+
+
+def run_news_sync(extractor=None, wordpress_api=None):
+    """Función principal para ejecutar la sincronización (acepta clientes ya creados, p. ej. en benchmarks)"""
     print("🚀 SINCRONIZADOR DE NOTICIAS: Pura Noticia → 247 Noticias")
     print("=" * 60)
     print(f"⏰ Ejecutándose en GitHub Actions - {datetime.now().strftime('%Y-%m-%d %H:%M:%S UTC')}")
@@ -498,83 +3703,173 @@ def run_news_sync():
         print("   Verifica que WP_SITE_URL, WP_USERNAME y WP_APP_PASSWORD estén en GitHub Secrets")
         return False
     
+    # Un solo recolector de métricas para toda la ejecución
+    metrics = Metrics()
+    run_started = time.perf_counter()
+    destinations = {}
+    
     try:
+        # Modo multi-destino: WP_DESTINATIONS reemplaza a WP_SITE_URL/WP_USERNAME/WP_APP_PASSWORD
+        if wordpress_api is None and os.getenv('WP_DESTINATIONS'):
+            unsupported_modes = [mode for mode in ('SYNC_WATCH', 'SYNC_BACKFILL', 'SYNC_PIPELINE')
+                                 if os.getenv(mode, '0') == '1']
+            if unsupported_modes:
+                print(f"❌ Error: {', '.join(unsupported_modes)} no se puede combinar con WP_DESTINATIONS")
+                return False
+            
+            destinations = create_destinations(json.loads(os.getenv('WP_DESTINATIONS')))
+            for destination in destinations.values():
+                destination.metrics = metrics
+            
+            if extractor is None:
+                extractor = create_extractor()
+            extractor.metrics = metrics
+            return run_fanout(extractor, destinations)
+        
         # PASO 1: Probar conexión con WordPress
         print("🔐 PASO 1: Probando conexión con WordPress...")
-        wordpress_api = WordPressAPI(
-            WORDPRESS_CONFIG['site_url'],
-            WORDPRESS_CONFIG['username'],
-            WORDPRESS_CONFIG['app_password']
-        )
+        if wordpress_api is None:
+            wordpress_api = create_wordpress_api(
+                WORDPRESS_CONFIG['site_url'],
+                WORDPRESS_CONFIG['username'],
+                WORDPRESS_CONFIG['app_password']
+            )
+        wordpress_api.metrics = metrics
         
         if not wordpress_api.test_connection():
             print("❌ No se pudo conectar con WordPress. Verifica las credenciales en GitHub Secrets.")
             return False
         
+        if extractor is None:
+            extractor = create_extractor()
+        extractor.metrics = metrics
+        if wordpress_api.outbox is not None:
+            extractor.outboxes = [wordpress_api.outbox]
+        
+        batch_publish = os.getenv('WP_BATCH_PUBLISH', '0') == '1'
+        
+        # Publicaciones que fallaron o quedaron a medias en ejecuciones anteriores
+        with metrics.span('sync_stage', stage='outbox'):
+            outbox_stats = drain_outbox(extractor, wordpress_api)
+        
+        # Modo continuo: el proceso queda vivo y consulta cada categoría según su intervalo
+        if os.getenv('SYNC_WATCH', '0') == '1':
+            print("\n👀 Modo continuo: consultando categorías con intervalo adaptativo (SIGTERM para detener)...")
+            stats = run_watch(extractor, wordpress_api)
+            print_summary(merge_stats(stats, outbox_stats), extractor, wordpress_api)
+            return True
+        
+        # Modo backfill: recorrer páginas anteriores de cada categoría
+        if os.getenv('SYNC_BACKFILL', '0') == '1':
+            print("\n📚 Backfill: recuperando noticias atrasadas...")
+            with metrics.span('sync_stage', stage='backfill'):
+                stats = run_backfill(extractor, wordpress_api)
+            
+            if extractor.http_cache:
+                extractor.http_cache.evict()
+            
+            print_summary(merge_stats(stats, outbox_stats), extractor, wordpress_api)
+            return True
+        
+        # Modo pipeline: cada noticia avanza por extracción, verificación y publicación
+        # apenas está lista, sin esperar al resto
+        if os.getenv('SYNC_PIPELINE', '0') == '1':
+            print("\n🔀 PASOS 2-4: Extrayendo, verificando y publicando en pipeline...")
+            with metrics.span('sync_stage', stage='pipeline'):
+                load_dedup_index(wordpress_api)
+                pipeline = SyncPipeline(
+                    extractor,
+                    wordpress_api,
+                    extract_workers=env_int('SYNC_EXTRACT_WORKERS', extractor.max_workers),
+                    dedup_workers=env_int('SYNC_DEDUP_WORKERS', 1),
+                    publish_workers=env_int('SYNC_PUBLISH_WORKERS', 2),
+                    queue_size=env_int('SYNC_QUEUE_SIZE', 4)
+                )
+                stats = pipeline.run()
+            
+            if extractor.http_cache:
+                extractor.http_cache.evict()
+            
+            print_summary(merge_stats(stats, outbox_stats), extractor, wordpress_api)
+            return True
+        
         # PASO 2: Extraer noticias de Pura Noticia
         print("\n📰 PASO 2: Extrayendo noticias de Pura Noticia...")
-        extractor = PuraNoticiaExtractor()
-        extracted_news = extractor.extract_latest_news()
+        with metrics.span('sync_stage', stage='extract'):
+            extracted_news = extractor.extract_latest_news()
+        
+        if extractor.http_cache:
+            extractor.http_cache.evict()
         
         if not extracted_news:
             print("⚠️ No se extrajeron noticias. Terminando proceso.")
+            if extractor.http_cache:
+                print(f"   • {extractor.http_cache.summary()}")
             return True  # No es error, simplemente no hay noticias nuevas
         
+        stats = {'extracted': len(extracted_news), 'existing': 0, 'created': 0, 'updated': 0, 'errors': 0}
+        
         # PASO 3: Verificar existencia en WordPress
         print(f"\n🔍 PASO 3: Verificando existencia en WordPress...")
         news_to_create = []
-        existing_count = 0
-        
-        for news in extracted_news:
-            if wordpress_api.post_exists(news['title'], news['category']):
-                existing_count += 1
-                print(f"   ⚠️ Ya existe: {news['title'][:50]}...")
-            else:
-                news_to_create.append(news)
-                print(f"   ✅ Nuevo: {news['title'][:50]}...")
+        with metrics.span('sync_stage', stage='dedup'):
+            load_dedup_index(wordpress_api)
+            
+            for news in extracted_news:
+                if wordpress_api.is_duplicate(news):
+                    stats['existing'] += 1
+                    extractor.mark_synced(news['url'])
+                    print(f"   ⚠️ Ya existe: {news['title'][:50]}...")
+                    update_existing(wordpress_api, news, stats)
+                else:
+                    news_to_create.append(news)
+                    print(f"   ✅ Nuevo: {news['title'][:50]}...")
         
         # PASO 4: Crear nuevas noticias
-        if news_to_create:
-            print(f"\n📝 PASO 4: Creando {len(news_to_create)} nuevas noticias...")
-            created_count = 0
-            error_count = 0
+        if news_to_create and batch_publish:
+            print(f"\n📝 PASO 4: Creando {len(news_to_create)} nuevas noticias en lotes...")
             
-            for i, news in enumerate(news_to_create):
-                print(f"\n   🔄 Creando {i+1}/{len(news_to_create)}: {news['title'][:50]}...")
-                
-                if wordpress_api.create_post(news):
-                    created_count += 1
+            with metrics.span('sync_stage', stage='publish'):
+                results = wordpress_api.create_posts_batch(news_to_create, env_int('WP_PUBLISH_WORKERS', 4))
+            for news, created in zip(news_to_create, results):
+                if created:
+                    stats['created'] += 1
+                    extractor.mark_synced(news['url'])
                 else:
-                    error_count += 1
-                
-                # Pausa más corta en GitHub Actions
-                time.sleep(1)
+                    stats['errors'] += 1
+        elif news_to_create:
+            print(f"\n📝 PASO 4: Creando {len(news_to_create)} nuevas noticias...")
+            
+            with metrics.span('sync_stage', stage='publish'):
+                for i, news in enumerate(news_to_create):
+                    print(f"\n   🔄 Creando {i+1}/{len(news_to_create)}: {news['title'][:50]}...")
+                    
+                    if wordpress_api.create_post(news):
+                        stats['created'] += 1
+                        extractor.mark_synced(news['url'])
+                    else:
+                        stats['errors'] += 1
+                    
+                    # Pausa más corta en GitHub Actions
+                    time.sleep(1)
         else:
             print(f"\nℹ️ No hay noticias nuevas para crear.")
-            created_count = 0
-            error_count = 0
         
         # RESUMEN FINAL
-        print("\n" + "=" * 60)
-        print("🎉 SINCRONIZACIÓN COMPLETADA")
-        print("=" * 60)
-        print(f"📊 ESTADÍSTICAS FINALES:")
-        print(f"   • Noticias extraídas: {len(extracted_news)}")
-        print(f"   • Ya existentes: {existing_count}")
-        print(f"   • Nuevas creadas: {created_count}")
-        print(f"   • Errores: {error_count}")
-        print("=" * 60)
-        
-        if created_count > 0:
-            print(f"✅ ¡Éxito! Se crearon {created_count} noticias nuevas en WordPress.")
-        else:
-            print("ℹ️ No había noticias nuevas para crear. Todas ya existían.")
-        
+        print_summary(merge_stats(stats, outbox_stats), extractor, wordpress_api)
         return True
             
     except Exception as e:
         print(f"❌ Error crítico: {e}")
         return False
+    
+    finally:
+        metrics.observe('sync_run', time.perf_counter() - run_started)
+        metrics.gauge('last_run_timestamp_seconds', int(time.time()))
+        export_metrics(metrics)
+        for destination in [wordpress_api, *destinations.values()]:
+            if destination and destination.image_optimizer:
+                destination.image_optimizer.close()
 
 # =========================================
 # EJECUCIÓN PRINCIPAL